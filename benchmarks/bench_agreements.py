@@ -0,0 +1,32 @@
+"""Agreement finder at 500 shared snacks: loop vs shared_favourites.
+
+    python benchmarks/bench_agreements.py [shared snacks]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from support import load_dashboard, loop_shared_favourites  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sd = load_dashboard()
+SHARED = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+rng = np.random.default_rng(0)
+index = pd.Index([f"Snack {i}" for i in range(SHARED)], name="Snack Label")
+mine = pd.DataFrame(rng.integers(1, 7, (SHARED, 4)).astype(float), index=index, columns=sd.RATING_LABELS)
+theirs = pd.DataFrame(rng.integers(1, 7, (SHARED, 4)).astype(float), index=index, columns=sd.RATING_LABELS)
+assert sd.shared_favourites(mine, theirs) == loop_shared_favourites(sd, mine, theirs)
+
+
+def per_call_ms(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1000
+
+
+loop_ms = per_call_ms(lambda: loop_shared_favourites(sd, mine, theirs), 3)
+vector_ms = per_call_ms(lambda: sd.shared_favourites(mine, theirs), 100)
+print(f"{SHARED} shared snacks: loop {loop_ms:.2f} ms, shared_favourites {vector_ms:.3f} ms "
+      f"({loop_ms / vector_ms:.0f}x)")
@@ -0,0 +1,65 @@
+"""Recall and latency of the approximate Snack Matches backend.
+
+Compares ApproximateSimilarity.top_k / least_similar with the exact answers
+(TasteMatrix.distances_from + closest) for a sample of people, across
+MATCH_ANN_CELLS and MATCH_ANN_PROBES. People come in taste clusters, as real
+raters roughly do; on structureless random ratings nearest neighbours are
+barely nearer than anyone else and no index helps. "farthest" is the
+distance of the least similar person found over the true largest one.
+
+    python benchmarks/bench_approximate.py [people]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from support import load_dashboard  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sd = load_dashboard()
+PEOPLE = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+SNACKS, RATED, CLUSTERS, K, QUERIES = 150, 30, 20, 4, 200
+
+rng = np.random.default_rng(1)
+rows = PEOPLE * RATED
+person, snack = rng.integers(0, PEOPLE, rows), rng.integers(0, SNACKS, rows)
+taste_of = rng.integers(1, 7, (CLUSTERS, SNACKS))[person % CLUSTERS, snack]
+df = pd.DataFrame({
+    sd.COL_NAME: [f"Person {i:05d}" for i in person],
+    "Snack Label": pd.Categorical.from_codes(snack, [f"Snack {i:03d}" for i in range(SNACKS)]),
+})
+for col in sd.RATING_COLS:
+    df[col] = np.clip(taste_of + rng.integers(-1, 2, rows), 1, 6).astype(float)
+taste = sd.TasteMatrix(sd.RatingCube(df))
+
+queries = rng.choice(len(taste.people), QUERIES, replace=False)
+start = time.perf_counter()
+exact = {}
+for q in queries:
+    dist = taste.distances_from(q)
+    exact[q] = (set(sd.closest(dist, K)), np.nanmax(dist))
+exact_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+print(f"{len(taste.people)} people × {SNACKS} snacks, {QUERIES} queries, exact row {exact_ms:.2f} ms")
+print(f"{'cells':>6} {'probes':>6} {'build s':>8} {'recall@' + str(K):>9} {'farthest':>9} {'ms/query':>9}")
+for cells in (None, 25, 200):
+    sd.MATCH_ANN_CELLS = cells
+    start = time.perf_counter()
+    index = sd.ApproximateSimilarity(taste)
+    build = time.perf_counter() - start
+    for probes in (1, 4, 8, 16):
+        sd.MATCH_ANN_PROBES = probes
+        hits, farthest, elapsed = 0, 0.0, 0.0
+        for q in queries:
+            start = time.perf_counter()
+            top = index.top_k(q, K)
+            _, far = index.least_similar(q)
+            elapsed += time.perf_counter() - start
+            hits += len(exact[q][0] & {other for other, _ in top})
+            farthest += far / exact[q][1]
+        label = cells or f"√n={int(np.sqrt(len(taste.people)))}"
+        print(f"{label:>6} {probes:>6} {build:>8.2f} {hits / (K * QUERIES):>9.3f} "
+              f"{farthest / QUERIES:>9.3f} {elapsed / QUERIES * 1000:>9.2f}")
@@ -0,0 +1,67 @@
+"""Incremental similarity: update latency against a full recompute.
+
+For 1k and 20k people (SNACKS snacks, RATED ratings each), times folding
+newly appended rating rows into IncrementalSimilarity against rebuilding it
+from scratch, reports the peak memory of the rebuild, and checks the
+updated distances stay within MATCH_FILL_TOLERANCE of a fresh build.
+
+    python benchmarks/bench_incremental.py [people ...]
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from support import load_dashboard  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sd = load_dashboard()
+SNACKS, RATED = 100, 20
+SIZES = [int(arg) for arg in sys.argv[1:]] or [1_000, 20_000]
+
+
+def ratings(rng, people, rows):
+    return pd.DataFrame({
+        sd.COL_NAME: [f"Person {i:05d}" for i in rng.integers(0, people, rows)],
+        "Snack Label": [f"Snack {i:03d}" for i in rng.integers(0, SNACKS, rows)],
+        **{col: rng.integers(1, 7, rows).astype(float) for col in sd.RATING_COLS},
+    })
+
+
+def timed(engine, df, version):
+    start = time.perf_counter()
+    engine.sync(df, version, "names")
+    return (time.perf_counter() - start) * 1000
+
+
+for people in SIZES:
+    rng = np.random.default_rng(0)
+    df = ratings(rng, people, people * RATED)
+
+    tracemalloc.start()
+    engine = sd.IncrementalSimilarity()
+    full_ms = timed(engine, df, 0)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{people} people: full recompute {full_ms:9.1f} ms, peak {peak / 2**20:7.1f} MiB "
+          f"(triangle {engine.totals.nbytes / 2**20:.1f} MiB)")
+
+    version = 0
+    for label, rows in (("1 row", 1), ("10 rows", 10), ("100 rows", 100)):
+        latencies = []
+        for _ in range(5):
+            df = pd.concat([df, ratings(rng, people, rows)], ignore_index=True)
+            version += 1
+            latencies.append(timed(engine, df, version))
+        print(f"{'':>{len(str(people))}}  append {label:>8}: {np.median(latencies):9.1f} ms")
+
+    fresh = sd.IncrementalSimilarity()
+    fresh.sync(df, "fresh", "names")
+    for name in rng.choice(fresh.people, 5, replace=False):
+        _, updated = engine.distances_from(df, version, "names", name)
+        _, rebuilt = fresh.distances_from(df, "fresh", "names", name)
+        assert np.nanmax(np.abs(updated - rebuilt)) <= sd.MATCH_FILL_TOLERANCE + 1e-6
+    print(f"{'':>{len(str(people))}}  updated distances within {sd.MATCH_FILL_TOLERANCE} of a rebuild")
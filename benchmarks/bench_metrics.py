@@ -0,0 +1,33 @@
+"""All-pairs throughput of each Snack Matches metric at 5k people.
+
+Builds the neighbour index (pairs=False, so only the metric and the top-k
+bookkeeping are timed) for every metric in MATCH_METRICS, and times a single
+person-against-everyone row.
+
+    python benchmarks/bench_metrics.py [people] [snacks] [rated]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from support import load_dashboard, synthetic_ratings  # noqa: E402
+
+sd = load_dashboard()
+ARGS = [int(arg) for arg in sys.argv[1:4]]
+PEOPLE, SNACKS, RATED = ARGS + [5_000, 100, 20][len(ARGS):]
+
+df = synthetic_ratings(sd, PEOPLE, SNACKS, PEOPLE * RATED)
+taste = sd.TasteMatrix(sd.RatingCube(df))
+pairs = len(taste.people) * (len(taste.people) - 1) // 2
+print(f"{len(taste.people)} people × {len(taste.snacks)} snacks, {len(df)} ratings")
+print(f"{'metric':<16} {'all pairs s':>11} {'M pairs/s':>10} {'one row ms':>11}")
+for metric in sd.MATCH_METRICS:
+    start = time.perf_counter()
+    sd.SimilarityIndex(taste, metric, pairs=False)
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for person in range(20):
+        sd.row_distances(taste, person, metric)
+    row_ms = (time.perf_counter() - start) / 20 * 1000
+    print(f"{metric:<16} {elapsed:>11.2f} {pairs / elapsed / 1e6:>10.2f} {row_ms:>11.2f}")
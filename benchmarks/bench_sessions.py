@@ -0,0 +1,62 @@
+"""Memory held by 1, 50 and 200 sessions rendering the same data version.
+
+Each simulated session keeps what one script run gets from the data layer
+for as long as it renders: with the old `st.cache_data` loader that is its
+own unpickled copy of the ratings frame (plus the "Snack Label" column it
+adds), with `prepare_ratings` (`st.cache_resource`) it is a reference to the
+one shared frame. Sessions run concurrently during the awards, so the copies
+are alive at the same time.
+
+    python benchmarks/bench_sessions.py [rows]
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from support import load_dashboard, synthetic_ratings  # noqa: E402
+
+import streamlit as st  # noqa: E402
+
+sd = load_dashboard()
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+raw = synthetic_ratings(sd, people=300, snacks=200, rows=ROWS).drop(columns="Snack Label")
+snack_names = {str(i): f"Snack {i}" for i in range(200)}
+
+
+@st.cache_data
+def load_data(version):
+    # The loader before the shared data layer
+    return raw
+
+
+def old_session():
+    df = load_data("v1")
+    df["Snack Label"] = df[sd.COL_SNACK].map(snack_names).fillna(df[sd.COL_SNACK])
+    return df
+
+
+def new_session():
+    df, _ = sd.prepare_ratings("v1", "v1", raw, snack_names)
+    return df
+
+
+def measure(session, count):
+    session()  # warm the cache, as the first viewer would
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = [session() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current / 2**20, elapsed / count * 1000
+
+
+print(f"{ROWS} rating rows, {raw.memory_usage(deep=True).sum() / 2**20:.1f} MiB as a frame")
+print(f"{'sessions':>8}  {'cache_data MiB':>14}  {'ms/run':>7}  {'cache_resource MiB':>18}  {'ms/run':>7}")
+for count in (1, 50, 200):
+    old_mib, old_ms = measure(old_session, count)
+    new_mib, new_ms = measure(new_session, count)
+    print(f"{count:>8}  {old_mib:>14.1f}  {old_ms:>7.2f}  {new_mib:>18.3f}  {new_ms:>7.2f}")
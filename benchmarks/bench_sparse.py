@@ -0,0 +1,55 @@
+"""Sparse vs dense Snack Matches rows at 10k people × 5k snacks.
+
+Each person rates RATED snacks, so there are people × RATED ratings against
+a people × snacks grid. Times one person-against-everyone row on the CSR
+backend (TasteMatrix.distances_from) and on the dense filled grid
+(row_distances, which builds the grid first), and checks they agree.
+
+    python benchmarks/bench_sparse.py [people] [snacks] [rated]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from support import load_dashboard  # noqa: E402
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sd = load_dashboard()
+ARGS = [int(arg) for arg in sys.argv[1:4]]
+PEOPLE, SNACKS, RATED = ARGS + [10_000, 5_000, 40][len(ARGS):]
+QUERIES = 20
+
+rng = np.random.default_rng(0)
+persons = np.repeat(np.arange(PEOPLE), RATED)
+snacks = np.concatenate([rng.choice(SNACKS, RATED, replace=False) for _ in range(PEOPLE)])
+df = pd.DataFrame({
+    sd.COL_NAME: pd.Index([f"Person {i:05d}" for i in range(PEOPLE)])[persons],
+    "Snack Label": pd.Categorical.from_codes(snacks, [f"Snack {i:05d}" for i in range(SNACKS)]),
+})
+for col in sd.RATING_COLS:
+    df[col] = rng.integers(1, 7, len(df)).astype(float)
+
+start = time.perf_counter()
+taste = sd.TasteMatrix(sd.RatingCube(df))
+print(f"{PEOPLE} people × {SNACKS} snacks, {len(df)} ratings "
+      f"({len(df) / PEOPLE / SNACKS:.2%} of the grid)")
+print(f"build CSR:          {time.perf_counter() - start:8.2f} s   "
+      f"{(taste.csr.data.nbytes + taste.csr.indices.nbytes + taste.csr.indptr.nbytes) / 2**20:8.1f} MiB")
+
+queries = rng.choice(PEOPLE, QUERIES, replace=False)
+start = time.perf_counter()
+sparse_rows = [taste.distances_from(person) for person in queries]
+print(f"sparse row:         {(time.perf_counter() - start) / QUERIES * 1000:8.2f} ms")
+
+start = time.perf_counter()
+grid = taste.grid
+print(f"build dense grid:   {time.perf_counter() - start:8.2f} s   {grid.nbytes / 2**20:8.1f} MiB")
+start = time.perf_counter()
+dense_rows = [sd.row_distances(taste, person, "filled") for person in queries]
+print(f"dense row:          {(time.perf_counter() - start) / QUERIES * 1000:8.2f} ms")
+
+assert all(np.allclose(a, b, equal_nan=True) for a, b in zip(sparse_rows, dense_rows))
+print("sparse and dense rows agree")
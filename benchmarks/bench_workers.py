@@ -0,0 +1,39 @@
+"""Similarity index build time with 1 to N worker threads (MATCH_WORKERS).
+
+Builds the all-pairs index for each metric with 1, 2, 4, … up to the number
+of cores, and checks every worker count gives the same neighbours. Run it on
+the machine that serves the dashboard before raising MATCH_WORKERS: only
+cdist ("filled" on the overall score) runs outside the GIL.
+
+    python benchmarks/bench_workers.py [people] [max workers]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+from support import load_dashboard, synthetic_ratings  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+sd = load_dashboard()
+PEOPLE = int(sys.argv[1]) if len(sys.argv) > 1 else 4_000
+MAX_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+WORKERS = sorted({1, *(2 ** i for i in range(1, MAX_WORKERS.bit_length())), MAX_WORKERS})
+
+taste = sd.TasteMatrix(sd.RatingCube(synthetic_ratings(sd, PEOPLE, 100, PEOPLE * 20)))
+print(f"{len(taste.people)} people, {os.cpu_count()} cores, workers {WORKERS}")
+print(f"{'metric':<16}" + "".join(f"{w:>9}w" for w in WORKERS) + "   speed-up")
+for metric in ("filled", "co-rated", "cosine", "pearson"):
+    times, reference = [], None
+    for workers in WORKERS:
+        sd.MATCH_WORKERS = workers
+        start = time.perf_counter()
+        index = sd.SimilarityIndex(taste, metric, pairs=False)
+        times.append(time.perf_counter() - start)
+        if reference is None:
+            reference = index
+        assert np.array_equal(index.nearest, reference.nearest)
+        assert np.array_equal(index.farthest, reference.farthest)
+    print(f"{metric:<16}" + "".join(f"{t:>9.2f}s" for t in times) + f"   {times[0] / min(times):.2f}x")
@@ -1,6 +1,21 @@
+import gzip
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+from scipy.sparse import csr_matrix
 from scipy.spatial.distance import cdist
 
 # ── CONFIG ────────────────────────────────────────────────────────────────────
@@ -21,8 +36,87 @@ COL_ORIGINALITY  = "How would you rate the ORIGINALITY of this snack?"
 COL_SNACK_NAME      = "What is your snack called?"
 COL_SNACK_ID_LOOKUP = "Snack ID:"
 
+# Sheets older than this are refreshed in the background while the old data
+# keeps being served; the Refresh button can't refetch more often than the cooldown
+REFRESH_TTL      = 60
+REFRESH_COOLDOWN = 10
+
+# A sheet export that takes longer than this (in seconds) fails; pages and
+# the poller stop waiting on a refresh after twice that
+FETCH_TIMEOUT = 15
+
+# A background thread re-checks both sheets every POLL_INTERVAL ± POLL_JITTER
+# seconds; open pages look for a new data version every RERUN_CHECK seconds
+POLL_INTERVAL = 30
+POLL_JITTER   = 5
+RERUN_CHECK   = 5
+
+# Last good copy of the cleaned sheets, so a restart can render without Google
+SNAPSHOT_DIR  = Path(__file__).parent / ".snapshots"
+SNAPSHOT_KEEP = 3
+
 RATING_COLS   = [COL_FLAVOUR, COL_TEXTURE, COL_SNACKABILITY, COL_ORIGINALITY]
 RATING_LABELS = ["Flavour", "Texture", "Snackability", "Originality"]
+ALL_CATEGORIES = tuple(range(len(RATING_COLS)))
+
+# "index" computes all pairs once per data version and answers every
+# selectbox change from it. "sparse" keeps only the ratings people actually
+# gave (CSR) and compares the selected person against everyone via the snacks
+# they rated; "dense" compares them against the full person × snack grid.
+# Those two compute one row per rerun instead. "blocked" goes through all
+# pairs like "index" but keeps only each person's nearest and farthest
+# neighbours, never the pairs themselves. "incremental" keeps one
+# all-pairs structure per process and folds newly appended ratings into it.
+# "approximate" never compares all pairs: it only ranks the people in the
+# groups of similar taste nearest the selected person, for very large rater counts.
+MATCH_BACKEND = "index"
+
+# The incremental backend centres ratings on the global mean as it was at its
+# last rebuild; it rebuilds once the live mean has drifted further than this
+MATCH_FILL_TOLERANCE = 0.05
+
+# "sparse", "incremental" and "approximate" only implement the "filled" metric
+# on the overall score; with any other metric, or per category, they fall back
+# to "dense". "index" and "blocked" only go through all pairs for this metric
+# on the overall score and compute one row for any other choice.
+MATCH_METRIC = "filled"
+
+# Neighbours per person kept by the index for O(k) top-k queries
+MATCH_TOP_K = 5
+
+# "co-rated" metric: pairs need this many snacks in common to be compared at
+# all, and count fully only from MATCH_SIGNIFICANCE shared snacks on
+MATCH_MIN_OVERLAP  = 2
+MATCH_SIGNIFICANCE = 5
+MAX_RATING_GAP     = 5  # ratings go from 1 to 6
+
+# Rough upper bound, in bytes, on the temporary arrays made while comparing
+# a block of rows; larger blocks are faster, smaller ones use less memory
+MATCH_MEMORY_BUDGET = 32 * 2**20
+
+# Threads the "index" and "blocked" backends spread blocks of rows over
+# (None: one per core). They all read the same arrays, so nothing is copied;
+# the memory budget is split between them. Whether more than one helps
+# depends on the machine and the metric (only "filled" on the overall score
+# runs outside the GIL, in cdist): measure with benchmarks/bench_workers.py
+# before raising it.
+MATCH_WORKERS = 1
+
+# "approximate" backend: people are grouped into MATCH_ANN_CELLS cells of
+# similar taste (None: √people) by MATCH_ANN_ROUNDS k-means rounds, and a query
+# compares against the people in the MATCH_ANN_PROBES closest cells. More
+# probes or fewer, larger cells: better recall, slower queries.
+MATCH_ANN_CELLS  = None
+MATCH_ANN_PROBES = 8
+MATCH_ANN_ROUNDS = 5
+
+# Snacks shown per category in Top Snacks
+TOP_SNACKS = 3
+
+# Top Snacks' "weighted average" ranking counts every snack as if it also
+# had this many ratings at the overall average of the category, so a snack
+# with few ratings can't top the board on a couple of lucky scores
+RANKING_PRIOR_WEIGHT = 5
 
 # Preferred categories for Snack Matches agreement
 PREFERRED_CATS = ["Flavour", "Texture", "Snackability", "Originality"]
@@ -96,73 +190,1054 @@ st.title("🍿 Snack Ratings")
 
 # ── LOAD DATA ─────────────────────────────────────────────────────────────────
 
-@st.cache_data(ttl=60)
-def load_data():
-    df = pd.read_csv(SHEET_URL)
+class SheetFetcher:
+    # Keeps the validators (ETag / Last-Modified) of the last export and the
+    # frame parsed from it. An unchanged sheet costs a 304 (or an identical
+    # body) and returns the cached frame without parsing anything.
+    # get() returns (frame, version), the version being a hash of the export.
+    def __init__(self, url):
+        self.url = url
+        self.lock = threading.Lock()
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+        self.parsed = None
+
+    def get(self, parse):
+        with self.lock:
+            req = urllib.request.Request(self.url, headers={"Accept-Encoding": "gzip"})
+            if self.parsed is not None:
+                if self.etag:
+                    req.add_header("If-None-Match", self.etag)
+                if self.last_modified:
+                    req.add_header("If-Modified-Since", self.last_modified)
+            try:
+                with urllib.request.urlopen(req, timeout=FETCH_TIMEOUT) as resp:
+                    body = self._read(resp)
+                    if resp.headers.get("Content-Encoding") == "gzip":
+                        body = gzip.decompress(body)
+                    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+            except urllib.error.HTTPError as e:
+                if e.code == 304 and self.parsed is not None:
+                    return self.parsed, self.digest[:16]
+                raise
+            digest = hashlib.sha256(body).hexdigest()
+            if digest != self.digest or self.parsed is None:
+                self.parsed = parse(body)
+                self.digest = digest
+            self.etag, self.last_modified = etag, last_modified
+            return self.parsed, self.digest[:16]
+
+    def _read(self, resp):
+        # The socket timeout is per read, so also bound the whole transfer:
+        # a server trickling bytes must not hold the sheet's refresh forever
+        deadline = time.monotonic() + FETCH_TIMEOUT
+        chunks = []
+        while chunk := resp.read(1 << 16):
+            chunks.append(chunk)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"sheet export took longer than {FETCH_TIMEOUT} s")
+        return b"".join(chunks)
+
+def normalize_snack_ids(ids):
+    # Numeric IDs ("12", "12.0", " 012 ", 12) all become "12", anything else
+    # is only stripped. One vectorized pass instead of int(float(x)) per row.
+    text = ids.astype(str).str.strip()
+    numbers = pd.to_numeric(text, errors="coerce")
+    numeric = np.isfinite(numbers)
+    return text.where(~numeric, numbers.where(numeric, 0).astype("int64").astype(str))
+
+def clean_ratings(df):
     df = df.dropna(subset=[COL_NAME, COL_SNACK] + RATING_COLS)
     df[COL_NAME] = df[COL_NAME].astype(str).str.strip()
+    df[COL_SNACK] = normalize_snack_ids(df[COL_SNACK])
     for col in RATING_COLS:
         df[col] = pd.to_numeric(df[col], errors="coerce")
     df = df.dropna(subset=RATING_COLS)
     return df
 
-@st.cache_data(ttl=60)
-def load_snack_names():
-    names_df = pd.read_csv(SNACK_NAMES_URL)
-    names_df[COL_SNACK_ID_LOOKUP] = names_df[COL_SNACK_ID_LOOKUP].apply(lambda x: str(int(float(x))).strip() if str(x).replace('.','',1).isdigit() else str(x).strip()).str.lstrip("0")
+class RatingsIngest:
+    # Form responses are append-only: remember how much of the sheet we have
+    # already parsed (bytes, rows, hash) and only parse the tail that was added.
+    # If the old part changed (someone edited a response) fall back to a full load.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.df = None
+        self.columns = None
+        self.n_bytes = 0
+        self.n_rows = 0
+        self.digest = None
+        self.ends_with_newline = True
+
+    def ingest(self, body):
+        with self.lock:
+            tail = self._appended_tail(body)
+            if tail is None:
+                self._full_load(body)
+            elif tail.strip():
+                try:
+                    new = pd.read_csv(io.BytesIO(tail), header=None)
+                except pd.errors.ParserError:
+                    new = None
+                if new is None or new.shape[1] != len(self.columns):
+                    self._full_load(body)
+                else:
+                    # Keep the sheet row numbers as index, same as a full load
+                    new.columns = self.columns
+                    new.index += self.n_rows
+                    self.df = pd.concat([self.df, clean_ratings(new)])
+                    self.n_rows += len(new)
+            self.n_bytes = len(body)
+            self.digest = hashlib.sha256(body).hexdigest()
+            self.ends_with_newline = body.endswith(b"\n")
+            return self.df
+
+    def _appended_tail(self, body):
+        if self.df is None or len(body) < self.n_bytes:
+            return None
+        if hashlib.sha256(body[:self.n_bytes]).hexdigest() != self.digest:
+            return None
+        tail = body[self.n_bytes:]
+        # Without a trailing newline the last old row could have been extended
+        if tail and not self.ends_with_newline and tail[:1] not in (b"\r", b"\n"):
+            return None
+        return tail
+
+    def _full_load(self, body):
+        raw = pd.read_csv(io.BytesIO(body))
+        self.columns = raw.columns
+        self.df = clean_ratings(raw)
+        self.n_rows = len(raw)
+
+# ── SNAPSHOTS ─────────────────────────────────────────────────────────────────
+
+def save_snapshot(name, df):
+    # Files are named by content hash, so an unchanged sheet writes nothing
+    version = hashlib.sha256(pd.util.hash_pandas_object(df).values.tobytes()).hexdigest()[:16]
+    path = SNAPSHOT_DIR / f"{name}-{version}.parquet"
+    try:
+        if path.exists():
+            path.touch()
+        else:
+            SNAPSHOT_DIR.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            df.to_parquet(tmp, index=False)
+            tmp.replace(path)
+        for old in snapshot_files(name)[SNAPSHOT_KEEP:]:
+            old.unlink(missing_ok=True)
+    except Exception:
+        pass  # a snapshot is best effort, never fail the page over it
+
+def snapshot_files(name):
+    return sorted(SNAPSHOT_DIR.glob(f"{name}-*.parquet"), key=lambda f: f.stat().st_mtime, reverse=True)
+
+def read_snapshot(name):
+    # (frame, version) of the newest readable snapshot, or None
+    for path in snapshot_files(name):
+        try:
+            return pd.read_parquet(path), path.stem.split("-", 1)[1]
+        except Exception:
+            continue
+    return None
+
+def snapshot_ratings():
+    snapshot = read_snapshot("ratings")
+    if snapshot is not None:
+        df, _ = snapshot
+        df[COL_SNACK] = normalize_snack_ids(df[COL_SNACK])
+    return snapshot
+
+def snapshot_snack_names():
+    snapshot = read_snapshot("snack_names")
+    if snapshot is None:
+        return None
+    names_df, version = snapshot
+    return dict(zip(names_df[COL_SNACK_ID_LOOKUP], names_df[COL_SNACK_NAME])), version
+
+# ── LOADERS ───────────────────────────────────────────────────────────────────
+
+def parse_ratings(ingest, body):
+    df = ingest.ingest(body)
+    save_snapshot("ratings", df[[COL_NAME, COL_SNACK] + RATING_COLS])
+    return df
+
+def parse_snack_names(body):
+    names_df = pd.read_csv(io.BytesIO(body))
+    names_df[COL_SNACK_ID_LOOKUP] = normalize_snack_ids(names_df[COL_SNACK_ID_LOOKUP])
     names_df[COL_SNACK_NAME]      = names_df[COL_SNACK_NAME].astype(str).str.strip()
+    save_snapshot("snack_names", names_df[[COL_SNACK_ID_LOOKUP, COL_SNACK_NAME]])
     return dict(zip(names_df[COL_SNACK_ID_LOOKUP], names_df[COL_SNACK_NAME]))
 
-def snack_label(snack_id, snack_names):
-    try:
-        key = str(int(float(snack_id))).strip()
-    except (ValueError, TypeError):
-        key = str(snack_id).strip()
-    name = snack_names.get(key)
-    return f"{name}" if name else str(snack_id)
+class SheetSource:
+    # Process-wide holder of one sheet's last good (value, version), shared by
+    # every session. Reads don't wait for the network once there is something
+    # to serve: a stale value keeps being returned while a single background
+    # refresh runs, and everyone asking for a refresh meanwhile joins that one.
+    # The value is shared, so treat it as read-only (copy before adding columns).
+    def __init__(self, url, parse, snapshot):
+        self.fetcher = SheetFetcher(url)
+        self.parse = parse
+        self.lock = threading.Lock()
+        self.value = snapshot()  # render from disk until the first fetch lands
+        self.error = None
+        self.seconds = 0.0
+        self.started_at = float("-inf")
+        self.inflight = None
+
+    def refresh(self, min_interval=0):
+        # Future of the running refresh, starting one if none is running and
+        # the last one started at least min_interval seconds ago (else None)
+        with self.lock:
+            if self.inflight is None and time.monotonic() - self.started_at >= min_interval:
+                self.started_at = time.monotonic()
+                self.inflight = Future()
+                threading.Thread(target=self._run, args=(self.inflight,), daemon=True).start()
+            return self.inflight
+
+    def _run(self, future):
+        start = time.perf_counter()
+        try:
+            value = self.fetcher.get(self.parse)
+        except Exception as e:
+            with self.lock:
+                self.error, self.seconds, self.inflight = e, time.perf_counter() - start, None
+            future.set_exception(e)
+        else:
+            with self.lock:
+                self.value, self.error, self.seconds, self.inflight = value, None, time.perf_counter() - start, None
+            future.set_result(value)
+
+    def current(self):
+        # Last good value; only blocks when there is nothing to serve yet
+        future = self.refresh(min_interval=REFRESH_TTL)
+        value = self.value
+        if value is None:
+            return (future or self.refresh()).result(timeout=2 * FETCH_TIMEOUT)
+        return value
+
+@st.cache_resource
+def data_sources():
+    return {
+        "ratings":     SheetSource(SHEET_URL, partial(parse_ratings, RatingsIngest()), snapshot_ratings),
+        "snack names": SheetSource(SNACK_NAMES_URL, parse_snack_names, snapshot_snack_names),
+    }
+
+def poll_sources(sources):
+    # Sources only parse when the export's hash changed, so an idle poll is
+    # just a conditional GET, and the version it publishes only moves on change
+    while True:
+        time.sleep(max(0, POLL_INTERVAL + random.uniform(-POLL_JITTER, POLL_JITTER)))
+        wait([source.refresh() for source in sources.values()], timeout=2 * FETCH_TIMEOUT)
+
+@st.cache_resource
+def start_poller():
+    thread = threading.Thread(target=poll_sources, args=(data_sources(),), daemon=True)
+    thread.start()
+    return thread
+
+def data_version(sources):
+    return tuple(source.value[1] if source.value is not None else None for source in sources.values())
+
+@st.fragment(run_every=RERUN_CHECK)
+def rerun_on_new_data(sources, rendered_version):
+    if data_version(sources) != rendered_version:
+        st.rerun()
+
+def load_sources(sources):
+    # Both sheets refresh at the same time on their own threads. Each source
+    # reports ((value, version), error, seconds) so one failing sheet doesn't
+    # sink the other; the seconds are those of its last fetch.
+    for source in sources.values():
+        source.refresh(min_interval=REFRESH_TTL)
+    loaded = {}
+    for name, source in sources.items():
+        try:
+            loaded[name] = (source.current(), None, source.seconds)
+        except Exception as e:
+            loaded[name] = (None, e, source.seconds)
+    return loaded
+
+def label_snacks(ids, snack_names):
+    # Categorical "Snack Label" plus a table of the IDs that have no name
+    names = ids.map(snack_names)
+    names = names.mask(names == "")
+    labels = names.fillna(ids).astype("category")
+    unresolved = (
+        ids[names.isna()]
+        .value_counts()
+        .rename_axis("Snack ID")
+        .reset_index(name="Ratings")
+    )
+    return labels, unresolved
+
+@st.cache_resource(max_entries=4)
+def prepare_ratings(ratings_version, names_version, _df, _snack_names):
+    # Everything derived from the raw rows happens here, once per pair of
+    # sheet versions, so widget reruns do no per-row work
+    df = _df[[COL_NAME, COL_SNACK] + RATING_COLS].copy()
+    df["Snack Label"], unresolved = label_snacks(df[COL_SNACK], _snack_names)
+    return df, unresolved
+
+# ── AGGREGATES ────────────────────────────────────────────────────────────────
+
+class RatingCube:
+    # Rating sums, counts and means per (person, snack) and category, from a
+    # single groupby per data version. Snack Matches reads its views from
+    # here (Top Snacks keeps running per-snack totals instead), so a rerun
+    # does no groupby work at all.
+    def __init__(self, df):
+        grouped = df.groupby([COL_NAME, "Snack Label"], observed=True)[RATING_COLS]
+        self.sums = grouped.sum()
+        self.counts = grouped.count()
+        self.means = self.sums / self.counts
+        self.people = self.means.index.get_level_values(0).unique()
+        self.global_mean = self.sums.values.sum() / self.counts.values.sum()
+        # Per-person, per-snack, per-category averages as Snack Matches shows them
+        self.person_detail = self.means.round(2)
+        self.person_detail.columns = RATING_LABELS
+
+@st.cache_resource(max_entries=4)
+def rating_cube(ratings_version, names_version, _df):
+    return RatingCube(_df)
+
+def rating_row_hashes(df):
+    # One hash per rating row, to tell appended rows from edited ones
+    return pd.util.hash_pandas_object(df[[COL_NAME, "Snack Label"] + RATING_COLS], index=False).values
+
+def is_append(hashes, seen_hashes):
+    # Whether the rows hashed as `hashes` are the rows seen so far plus new ones
+    return len(hashes) >= len(seen_hashes) and np.array_equal(hashes[:len(seen_hashes)], seen_hashes)
+
+class SnackTotals:
+    # Per-snack rating sums, row counts and distinct-rater counts of one data
+    # version, for Top Snacks. Never changed once built: extend() returns the
+    # totals of a version with more rows appended, in O(new rows) plus a
+    # copy of the rated pairs.
+    def __init__(self, names_version):
+        self.names_version = names_version
+        self.labels, self.codes = [], {}
+        self.sums = np.zeros((0, len(RATING_COLS)))
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.raters = np.zeros(0, dtype=np.int64)
+        self.row_hashes = np.zeros(0, dtype=np.uint64)
+        # (name, snack) pairs with a rating in this version. Each version has
+        # its own copy: two versions extended from the same totals (say, one
+        # appended to and one rebuilt after an edit) must not see each
+        # other's raters
+        self.rated_pairs = set()
+
+    def extend(self, rows, row_hashes):
+        totals = SnackTotals(self.names_version)
+        totals.rated_pairs, totals.row_hashes = set(self.rated_pairs), row_hashes
+        labels = rows["Snack Label"].astype(object)
+        totals.labels, totals.codes = list(self.labels), dict(self.codes)
+        for label in labels.unique():
+            if label not in totals.codes:
+                totals.codes[label] = len(totals.labels)
+                totals.labels.append(label)
+        n, old = len(totals.labels), len(self.labels)
+        totals.sums = np.vstack([self.sums, np.zeros((n - old, len(RATING_COLS)))])
+        totals.counts = np.concatenate([self.counts, np.zeros(n - old, dtype=np.int64)])
+        totals.raters = np.concatenate([self.raters, np.zeros(n - old, dtype=np.int64)])
+        codes = labels.map(totals.codes).to_numpy(dtype=np.intp)
+        np.add.at(totals.sums, codes, rows[RATING_COLS].to_numpy(dtype=float))
+        np.add.at(totals.counts, codes, 1)
+        for pair in zip(rows[COL_NAME], labels):
+            if pair not in totals.rated_pairs:
+                totals.rated_pairs.add(pair)
+                totals.raters[totals.codes[pair[1]]] += 1
+        return totals
+
+    def rater_count(self, label):
+        return int(self.raters[self.codes[label]]) if label in self.codes else 0
+
+    def averages(self, min_raters, order):
+        # Category means of the snacks with at least `min_raters` distinct
+        # raters, in `order` (the Snack Label categories)
+        keep = self.raters >= min_raters
+        averages = pd.DataFrame(
+            self.sums[keep] / self.counts[keep, None],
+            index=pd.Index(self.labels, dtype=object)[keep], columns=RATING_LABELS,
+        )
+        return averages.loc[order.intersection(averages.index, sort=False)]
+
+    def shrunk_averages(self, weight, order):
+        # Every rated snack's category means pulled towards the overall
+        # category means by `weight` pseudo-ratings:
+        # (sum + weight · prior) / (count + weight)
+        prior = self.sums.sum(axis=0) / max(self.counts.sum(), 1)
+        averages = pd.DataFrame(
+            (self.sums + weight * prior) / (self.counts[:, None] + weight),
+            index=pd.Index(self.labels, dtype=object), columns=RATING_LABELS,
+        )
+        return averages.loc[order.intersection(averages.index, sort=False)]
+
+class RunningSnackTotals:
+    # Process-wide SnackTotals of the last few data versions. A new version
+    # is extended from the longest kept one its rows start with (same snack
+    # names, no edited rows), else built from scratch; sessions still
+    # rendering an older version keep getting that version's totals.
+    KEPT = 4
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.versions = OrderedDict()
+
+    def sync(self, df, ratings_version, names_version):
+        key = (ratings_version, names_version)
+        with self.lock:
+            if key not in self.versions:
+                hashes = rating_row_hashes(df)
+                bases = [totals for totals in self.versions.values()
+                         if totals.names_version == names_version and is_append(hashes, totals.row_hashes)]
+                base = max(bases, key=lambda totals: len(totals.row_hashes), default=None)
+                if base is None:
+                    base = SnackTotals(names_version)
+                self.versions[key] = base.extend(df.iloc[len(base.row_hashes):], hashes)
+                while len(self.versions) > self.KEPT:
+                    self.versions.popitem(last=False)
+            self.versions.move_to_end(key)
+            return self.versions[key]
+
+@st.cache_resource
+def snack_totals():
+    return RunningSnackTotals()
+
+class Leaderboard:
+    # Per-category rankings of a snacks × categories score array. top(k)
+    # partitions all categories at once with argpartition and only sorts
+    # the few snacks at or above each k-th best score; the full ranking is
+    # sorted once, on first use, and top(k) reads from it afterwards. Equal
+    # scores go to the snack that comes first, as with nlargest.
+    def __init__(self, labels, scores):
+        self.labels = np.asarray(labels, dtype=object)
+        self.scores = np.asarray(scores, dtype=float)
+        self.positions = {label: i for i, label in enumerate(self.labels)}
+        self._ranking = None
+        self._ranks = None
+
+    def top(self, k):
+        # Snack positions per category (categories × k), best first
+        k = min(k, len(self.labels))
+        if self._ranking is not None or k == 0:
+            return self.ranking()[:, :k]
+        kth = -np.partition(-self.scores, k - 1, axis=0)[k - 1]
+        top = np.empty((self.scores.shape[1], k), dtype=np.intp)
+        for cat, threshold in enumerate(kth):
+            # flatnonzero is in snack order, so a stable sort breaks ties by position
+            candidates = np.flatnonzero(self.scores[:, cat] >= threshold)
+            top[cat] = candidates[np.argsort(-self.scores[candidates, cat], kind="stable")[:k]]
+        return top
+
+    def ranking(self):
+        # Every snack per category (categories × snacks), best first
+        if self._ranking is None:
+            self._ranking = np.argsort(-self.scores, axis=0, kind="stable").T
+        return self._ranking
+
+    def ranks(self):
+        # Rank of every snack per category (snacks × categories), 1 = best;
+        # equal scores share the better rank (1, 2, 2, 4)
+        if self._ranks is None:
+            ranking = self.ranking()
+            ranks = np.empty(self.scores.shape, dtype=np.intp)
+            for cat, order in enumerate(ranking):
+                ordered = -self.scores[order, cat]
+                ranks[order, cat] = np.searchsorted(ordered, ordered, side="left") + 1
+            self._ranks = ranks
+        return self._ranks
+
+    def standing(self, label):
+        # [(rank, percentile)] per category for one snack, or None if it isn't
+        # ranked; percentile p means the snack is in the top p% of snacks
+        if label not in self.positions:
+            return None
+        return [(rank, 100 * rank / len(self.labels)) for rank in self.ranks()[self.positions[label]]]
+
+@st.cache_resource(max_entries=4)
+def leaderboard(ratings_version, names_version, ranking, _snack_avgs):
+    return Leaderboard(_snack_avgs.index, _snack_avgs[RATING_LABELS].to_numpy())
 
+# ── TASTE SIMILARITY ──────────────────────────────────────────────────────────
 
-try:
-    df = load_data()
-except Exception as e:
-    st.error(f"Could not load ratings sheet.\n\nError: {e}")
+class TasteMatrix:
+    # Person × snack mean ratings as a sparse matrix. People and snacks are
+    # integer codes into the sorted `people` / `snacks` arrays. Values are
+    # stored relative to the global mean, which is what a missing rating is
+    # filled with, so the missing cells are exactly the implicit zeros.
+    def __init__(self, cube):
+        pair_categories = cube.means
+        pair_means = pair_categories.mean(axis=1)
+        person_codes, self.people = pd.factorize(pair_means.index.get_level_values(0), sort=True)
+        snack_codes, self.snacks = pd.factorize(pair_means.index.get_level_values(1), sort=True)
+        self.fill = cube.global_mean
+        shape = (len(self.people), len(self.snacks))
+        self.csr = csr_matrix((pair_means.values - self.fill, (person_codes, snack_codes)), shape=shape)
+        self.csc = self.csr.tocsc()
+        # Per-category means relative to the fill, in the csr's storage order:
+        # the category layers are the csr's own pattern with other data, so
+        # they cost len(RATING_COLS) floats per rating, never a dense grid
+        order = np.lexsort((snack_codes, person_codes))
+        self._category_data = (pair_categories.values[order] - self.fill).T
+        # Rating behind each csc entry, as a position into csr-ordered data
+        self._by_column = csr_matrix((np.arange(self.csr.nnz), self.csr.indices, self.csr.indptr), shape=shape).tocsc().data
+        self._owners = np.repeat(np.arange(len(self.people)), np.diff(self.csr.indptr))
+        # Cityblock distance to the all-fill row, i.e. |x - fill| summed per person
+        self.norm1 = np.asarray(abs(self.csr).sum(axis=1)).ravel()
+        self._grid = None
+        # Shared by sessions and index workers: lazy arrays are built once
+        self._lock = threading.RLock()
+
+    @property
+    def grid(self):
+        # Dense filled grid (still relative to the fill), built on first use
+        with self._lock:
+            if self._grid is None:
+                self._grid = self.csr.toarray()
+        return self._grid
+
+    def distances_from(self, person):
+        # Mean cityblock distance (as cdist on the filled grid / #snacks) from
+        # one person to everyone. With v = x - fill:
+        #   |a - b|_1 = |a|_1 + |b|_1 - sum over co-rated snacks of (|a| + |b| - |a - b|)
+        # so only the ratings on the snacks this person rated are touched.
+        row = self.csr[person]
+        mine = np.zeros(len(self.snacks))
+        mine[row.indices] = row.data
+        shared = self.csc[:, row.indices].tocoo()
+        a, b = mine[row.indices][shared.col], shared.data
+        overlap = np.bincount(shared.row, weights=np.abs(a) + np.abs(b) - np.abs(a - b), minlength=len(self.people))
+        dist = (self.norm1[person] + self.norm1 - overlap) / len(self.snacks)
+        dist[person] = np.nan
+        # Drop float noise so equal distances tie (first person wins, as with idxmin)
+        return dist.round(10)
+
+    def layer_data(self, categories):
+        # Ratings relative to the fill, in csr order, one row per compared
+        # layer: the overall means for categories=None, else each category
+        if categories is None:
+            return self.csr.data[None]
+        return self._category_data[list(categories)]
+
+    def person_sums(self, values):
+        # layers × people sums of per-rating values (layers × ratings, csr order)
+        return np.stack([np.bincount(self._owners, weights=layer, minlength=len(self.people)) for layer in values])
+
+    def co_rated(self, person):
+        # Every snack `person` shares with someone (themselves included), as
+        # (the other person, position of person's rating, position of theirs)
+        # into csr-ordered data; O(ratings of the snacks they rated)
+        start, end = self.csr.indptr[person:person + 2]
+        snacks = self.csr.indices[start:end]
+        lo, sizes = self.csc.indptr[snacks], np.diff(self.csc.indptr)[snacks]
+        at = np.repeat(lo - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+        return self.csc.indices[at], np.repeat(np.arange(start, end), sizes), self._by_column[at]
+
+@st.cache_resource(max_entries=4)
+def taste_matrix(ratings_version, names_version, _cube):
+    # Built once per data version and shared by every session
+    return TasteMatrix(_cube)
+
+# Every metric takes (taste, rows, categories) and returns a layers × rows ×
+# people block of distances: one layer for the overall score, or one per
+# chosen category, all computed in the same stacked pass.
+
+def co_rated_sums(taste, rows, data, *terms):
+    # For each of `rows` against everyone: layers × rows × people sums, over
+    # the snacks both people rated, of each term(a, b), where a and b are the
+    # two sides' values (layers × shared snacks) taken from `data`
+    n = len(taste.people)
+    sums = [np.zeros((len(data), len(rows), n)) for _ in terms]
+    for i, person in enumerate(rows):
+        others, mine, theirs = taste.co_rated(person)
+        a, b = data[:, mine], data[:, theirs]
+        for total, term in zip(sums, terms):
+            for layer, weights in enumerate(np.broadcast_to(term(a, b), a.shape)):
+                total[layer, i] = np.bincount(others, weights=weights, minlength=n)
+    return sums
+
+def filled_distances(taste, rows, categories):
+    if categories is None:
+        grid = taste.grid
+        return cdist(grid[rows], grid, metric="cityblock")[None] / len(taste.snacks)
+    # Per category without a dense grid, the way TasteMatrix.distances_from does it
+    data = taste.layer_data(categories)
+    norm1 = taste.person_sums(np.abs(data))
+    overlap, = co_rated_sums(taste, rows, data, lambda a, b: np.abs(a) + np.abs(b) - np.abs(a - b))
+    return (norm1[:, rows, None] + norm1[:, None, :] - overlap) / len(taste.snacks)
+
+def co_rated_distances(taste, rows, categories):
+    # Mean rating gap over the snacks both people rated; no fill value at all.
+    # Pairs with fewer than MATCH_MIN_OVERLAP shared snacks get NaN, and
+    # significance weighting (similarity · min(overlap, γ) / γ, on a 0–1
+    # similarity scale) pulls pairs with little overlap towards "unrelated".
+    # The fill cancels in a - b.
+    overlap, gaps = co_rated_sums(taste, rows, taste.layer_data(categories), lambda a, b: 1.0, lambda a, b: np.abs(a - b))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        similarity = 1 - gaps / overlap / MAX_RATING_GAP
+    similarity *= np.minimum(overlap, MATCH_SIGNIFICANCE) / MATCH_SIGNIFICANCE
+    similarity[overlap < MATCH_MIN_OVERLAP] = np.nan
+    return (1 - similarity) * MAX_RATING_GAP
+
+# The similarity metrics below are sums over the snacks both people rated
+# (a product only has terms there) of raw or centred ratings, read from the
+# stored ratings; distance = 1 - similarity, from 0 to 2. People a metric
+# can't compare (nothing rated in common, no spread) get NaN.
+
+def tile_rows(cells_per_row):
+    # Rows per block so that a block's float64 temporaries fit MATCH_MEMORY_BUDGET
+    return max(1, MATCH_MEMORY_BUDGET // (8 * max(1, cells_per_row)))
+
+def cosine_of(taste, rows, values):
+    norms = np.sqrt(taste.person_sums(values ** 2))
+    dots, = co_rated_sums(taste, rows, values, np.multiply)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return dots / (norms[:, rows, None] * norms[:, None, :])
+
+def cosine_distances(taste, rows, categories):
+    return 1 - cosine_of(taste, rows, taste.layer_data(categories) + taste.fill)
+
+def centred_cosine_distances(taste, rows, categories):
+    # Cosine after taking each person's own average off their ratings, so a
+    # harsh and a generous rater with the same preferences still match
+    values = taste.layer_data(categories) + taste.fill
+    means = taste.person_sums(values) / np.diff(taste.csr.indptr)
+    return 1 - cosine_of(taste, rows, values - means[:, taste._owners])
+
+def pearson_distances(taste, rows, categories):
+    # Pearson correlation over the snacks both rated, from sums over the
+    # co-rated cells
+    x = taste.layer_data(categories) + taste.fill
+    n, sum_a, sum_b, sq_a, sq_b, products = co_rated_sums(
+        taste, rows, x, lambda a, b: 1.0, lambda a, b: a, lambda a, b: b,
+        lambda a, b: a * a, lambda a, b: b * b, np.multiply,
+    )
+    # n² · variance of each side; the subtraction cancels to float noise
+    # (maybe negative) for someone who gave every shared snack the same score
+    var_a, var_b = n * sq_a - sum_a ** 2, n * sq_b - sum_b ** 2
+    flat = (var_a <= 1e-9 * n * sq_a) | (var_b <= 1e-9 * n * sq_b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (n * products - sum_a * sum_b) / np.sqrt(var_a * var_b)
+    # No spread, no correlation; two shared snacks always correlate ±1, so
+    # ask for at least three
+    r[flat] = np.nan
+    r[n < max(3, MATCH_MIN_OVERLAP)] = np.nan
+    return 1 - np.clip(r, -1, 1)
+
+MATCH_METRICS = {
+    "filled":         ("Average gap, unrated snacks count as the average rating", filled_distances),
+    "co-rated":       ("Average gap on the snacks you both rated", co_rated_distances),
+    "cosine":         ("Cosine similarity of your ratings", cosine_distances),
+    "pearson":        ("Correlation of your ratings on shared snacks", pearson_distances),
+    "centred cosine": ("Cosine similarity of your ratings relative to your own average", centred_cosine_distances),
+}
+
+def metric_distances(taste, rows, metric, categories=None):
+    # rows × people distances; per-category distances are averaged over the
+    # categories that could be compared
+    layers = MATCH_METRICS[metric][1](taste, rows, categories)
+    if len(layers) == 1:
+        return layers[0]
+    counts = (~np.isnan(layers)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, np.nansum(layers, axis=0) / counts, np.nan)
+
+def row_distances(taste, person, metric, categories=None):
+    # One person against everyone: O(people · snacks) per layer
+    dist = metric_distances(taste, np.array([person]), metric, categories)[0]
+    dist[person] = np.nan
+    # Drop float noise so equal distances tie (first person wins, as with idxmin)
+    return dist.round(10)
+
+def closest(dist, k):
+    # Indices of the k smallest distances (NaN = self / no overlap excluded),
+    # closest first; ties go to the lowest index, as with idxmin. Everyone
+    # level with the k-th distance stays a candidate, so a tie at the cut-off
+    # can't drop them.
+    candidates = np.flatnonzero(~np.isnan(dist))
+    if k < len(candidates):
+        kth = np.partition(dist[candidates], k - 1)[k - 1]
+        candidates = candidates[dist[candidates] <= kth]
+    return candidates[np.argsort(dist[candidates], kind="stable")[:k]]
+
+def pair_position(capacity, lo, hi):
+    # Offset of pair (lo, hi), lo < hi, in a condensed triangle of `capacity` people
+    return capacity * lo - lo * (lo + 1) // 2 + hi - lo - 1
+
+class SimilarityIndex:
+    # All-pairs distances stored pdist-style: only the upper triangle, as one
+    # condensed float32 array (n·(n-1)/2 values, a quarter of the square
+    # float64 matrix). Each person's closest MATCH_TOP_K and farthest
+    # neighbour (with their exact distances) are found while building, so
+    # queries are O(1) / O(k). Missing neighbours (NaN distances) are -1.
+    #
+    # With pairs=False only those per-person neighbours are kept: memory is
+    # O(people · MATCH_TOP_K) plus one block of rows at a time, and top-k
+    # beyond MATCH_TOP_K recomputes the person's row.
+    def __init__(self, taste, metric, categories=None, pairs=True):
+        self.taste, self.metric, self.categories = taste, metric, categories
+        self.n = n = len(taste.people)
+        self.k = min(MATCH_TOP_K, n - 1)
+        self.nearest = np.full((n, self.k), -1, dtype=np.int32)
+        self.nearest_dist = np.full((n, self.k), np.nan)
+        self.farthest = np.full(n, -1, dtype=np.int32)
+        self.farthest_dist = np.full(n, np.nan)
+        self.condensed = np.empty(n * (n - 1) // 2, dtype=np.float32) if pairs else None
+        layers = 1 if categories is None else len(categories)
+        workers = MATCH_WORKERS or os.cpu_count() or 1
+        # The metric's inputs per row, and its layers × rows × people output
+        tile = tile_rows(workers * layers * n * (len(taste.snacks) + 1))
+        starts = range(0, n, tile)
+        if workers > 1 and len(starts) > 1:
+            # Blocks write disjoint rows (and triangle slices), so threads
+            # share everything as is
+            with ThreadPoolExecutor(workers) as pool:
+                list(pool.map(partial(self._add_block, tile), starts))
+        else:
+            for start in starts:
+                self._add_block(tile, start)
+
+    def _add_block(self, tile, start):
+        n, pairs = self.n, self.condensed is not None
+        block = metric_distances(self.taste, np.arange(start, min(start + tile, n)), self.metric, self.categories).round(10)
+        for person, dist in enumerate(block, start):
+            if pairs:
+                at = pair_position(n, person, person + 1)
+                self.condensed[at:at + n - person - 1] = dist[person + 1:]
+            dist[person] = np.nan
+            near = closest(dist, self.k)
+            self.nearest[person, :len(near)] = near
+            self.nearest_dist[person, :len(near)] = dist[near]
+            if len(near):
+                self.farthest[person] = np.nanargmax(dist)
+                self.farthest_dist[person] = dist[self.farthest[person]]
+
+    def distance(self, a, b):
+        if self.condensed is None:
+            return float(self.row(a)[b])
+        return float(self.condensed[pair_position(self.n, min(a, b), max(a, b))])
+
+    def row(self, person):
+        if self.condensed is None:
+            return row_distances(self.taste, person, self.metric, self.categories)
+        others = np.arange(self.n)
+        lo, hi = np.minimum(person, others), np.maximum(person, others)
+        dist = self.condensed[np.where(others == person, 0, pair_position(self.n, lo, hi))].astype(float)
+        dist[person] = np.nan
+        return dist
+
+    def most_similar(self, person):
+        return self.nearest[person, 0], self.nearest_dist[person, 0]
+
+    def least_similar(self, person):
+        return self.farthest[person], self.farthest_dist[person]
+
+    def top_k(self, person, k):
+        # O(k) from the stored neighbours; beyond MATCH_TOP_K read the full row
+        if k > self.k:
+            dist = self.row(person)
+            return [(other, dist[other]) for other in closest(dist, k)]
+        return [(other, dist) for other, dist in zip(self.nearest[person, :k], self.nearest_dist[person, :k]) if other >= 0]
+
+@st.cache_resource(max_entries=4)
+def similarity_index(ratings_version, names_version, metric, categories, pairs, _taste):
+    return SimilarityIndex(_taste, metric, categories, pairs)
+
+class IncrementalSimilarity:
+    # All-pairs cityblock totals (not yet divided by #snacks) kept up to date
+    # as rating rows are appended. A batch of new rows only recomputes the
+    # rows/columns of the people who rated: O(people · snacks) each, vectorized.
+    #
+    # The fill for missing ratings is the global mean as of the last rebuild
+    # (the anchor), not the live mean. Pairs that both rated a snack don't
+    # depend on the fill, so for each pair only the snacks exactly one of them
+    # rated can move, each by at most |live mean - anchor|: every mean distance
+    # is within MATCH_FILL_TOLERANCE of what a full recompute would give.
+    # Beyond that it rebuilds and re-anchors. Storage grows by ~25% at a time.
+    #
+    # There is one engine per process and it only moves forward: a session
+    # still rendering a version the engine has already moved past gets None
+    # from distances_from and computes its one row itself, rather than
+    # rebuilding the engine back to its version (and the next session forward).
+    PASSED_KEPT = 16
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.synced = None
+        self.passed = OrderedDict()
+        self.reset()
+
+    def reset(self):
+        self.people, self.person_codes = [], {}
+        self.snacks, self.snack_codes = [], {}
+        self.by_name = None
+        self.sums = np.zeros((0, 0))                 # sum of category ratings per (person, snack)
+        self.counts = np.zeros((0, 0), dtype=np.int32)
+        self.grid = np.zeros((0, 0))                 # pair mean - anchor, 0 if not rated
+        self.totals = np.zeros(0, dtype=np.float32)  # condensed, `capacity` people
+        self.capacity = 0
+        self.total = 0.0
+        self.count = 0
+        self.anchor = None
+        self.consumed = 0
+        self.row_hashes = np.zeros(0, dtype=np.uint64)
+
+    def sync(self, df, ratings_version, names_version):
+        # Fold in the rows appended since the last sync. Relabelled snacks or
+        # an edited older row (the hash of the rows seen so far changed) mean
+        # starting over.
+        with self.lock:
+            self._sync(df, ratings_version, names_version)
+
+    def _sync(self, df, ratings_version, names_version):
+        if self.synced == (ratings_version, names_version):
+            return
+        hashes = rating_row_hashes(df)
+        if self.synced is None or names_version != self.synced[1] or not is_append(hashes, self.row_hashes):
+            self.reset()
+        self.add(df.iloc[self.consumed:])
+        self.consumed, self.row_hashes = len(df), hashes
+        if self.synced is not None:
+            self.passed[self.synced] = True
+            while len(self.passed) > self.PASSED_KEPT:
+                self.passed.popitem(last=False)
+        self.passed.pop((ratings_version, names_version), None)
+        self.synced = (ratings_version, names_version)
+
+    def add(self, rows):
+        if rows.empty:
+            return
+        persons = np.array([self._code(self.person_codes, self.people, name) for name in rows[COL_NAME]])
+        snacks = np.array([self._code(self.snack_codes, self.snacks, label) for label in rows["Snack Label"]])
+        self._grow()
+        row_sums = rows[RATING_COLS].sum(axis=1).values
+        np.add.at(self.sums, (persons, snacks), row_sums)
+        np.add.at(self.counts, (persons, snacks), 1)
+        self.total += row_sums.sum()
+        self.count += rows.shape[0] * len(RATING_COLS)
+        if self.anchor is None or abs(self.total / self.count - self.anchor) > MATCH_FILL_TOLERANCE:
+            self.rebuild()
+            return
+        cells = (persons, snacks)
+        self.grid[cells] = self.sums[cells] / (self.counts[cells] * len(RATING_COLS)) - self.anchor
+        for person in np.unique(persons):
+            self._update(person)
+
+    def rebuild(self):
+        n = len(self.people)
+        self.anchor = self.total / self.count
+        rated = self.counts > 0
+        self.grid = np.where(rated, self.sums / np.maximum(self.counts, 1) / len(RATING_COLS) - self.anchor, 0.0)
+        # Row blocks against the people after them straight into the triangle,
+        # so no n·(n-1)/2 float64 temporary: O(people) memory per block row
+        grid = self.grid[:n, :len(self.snacks)]
+        tile = tile_rows(n)
+        for start in range(0, n, tile):
+            block = cdist(grid[start:start + tile], grid[start:], metric="cityblock")
+            for lo, row in enumerate(block, start):
+                at = pair_position(self.capacity, lo, lo + 1)
+                self.totals[at:at + n - lo - 1] = row[lo - start + 1:]
+
+    def _code(self, codes, names, name):
+        if name not in codes:
+            codes[name] = len(names)
+            names.append(name)
+            self.by_name = None
+        return codes[name]
+
+    def _grow(self):
+        n, s = len(self.people), len(self.snacks)
+        rows, cols = self.sums.shape
+        if n <= rows and s <= cols:
+            return
+        rows, cols = max(rows, n + n // 4 + 8), max(cols, s + s // 4 + 8)
+        for name in ("sums", "counts", "grid"):
+            old = getattr(self, name)
+            new = np.zeros((rows, cols), dtype=old.dtype)
+            new[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, new)
+        if rows > self.capacity:
+            totals = np.zeros(rows * (rows - 1) // 2, dtype=np.float32)
+            for lo in range(self.capacity - 1):
+                old, new = pair_position(self.capacity, lo, lo + 1), pair_position(rows, lo, lo + 1)
+                totals[new:new + self.capacity - lo - 1] = self.totals[old:old + self.capacity - lo - 1]
+            self.totals, self.capacity = totals, rows
+
+    def _update(self, person):
+        n = len(self.people)
+        row = np.abs(self.grid[:n] - self.grid[person]).sum(axis=1)
+        before, after = np.arange(person), np.arange(person + 1, n)
+        self.totals[pair_position(self.capacity, before, person)] = row[before]
+        start = pair_position(self.capacity, person, person + 1)
+        self.totals[start:start + len(after)] = row[after]
+
+    def distances_from(self, df, ratings_version, names_version, name):
+        # (people sorted by name, mean cityblock distance from `name` to each)
+        # as of the given version, sorted so ties go to the same person as
+        # with the other backends. Synced and read under one lock, so another
+        # session can't move the engine to its version in between. None if the
+        # engine has moved past that version or doesn't know `name`.
+        with self.lock:
+            if (ratings_version, names_version) in self.passed:
+                return None
+            self._sync(df, ratings_version, names_version)
+            if name not in self.person_codes:
+                return None
+            if self.by_name is None:
+                self.by_name = np.argsort(np.array(self.people, dtype=object), kind="stable")
+            person = self.person_codes[name]
+            others = self.by_name
+            lo, hi = np.minimum(person, others), np.maximum(person, others)
+            dist = self.totals[np.where(others == person, 0, pair_position(self.capacity, lo, hi))] / len(self.snacks)
+            dist = dist.astype(float).round(10)
+            dist[others == person] = np.nan
+            return [self.people[other] for other in others], dist
+
+@st.cache_resource
+def incremental_similarity():
+    return IncrementalSimilarity()
+
+class ApproximateSimilarity:
+    # Approximate nearest / farthest neighbours for the "filled" metric, for
+    # rater counts where even one all-pairs pass is too much. An inverted-file
+    # index: a few k-means rounds split people into MATCH_ANN_CELLS cells of
+    # similar taste, and a query only looks at the members of the
+    # MATCH_ANN_PROBES cells whose centres are nearest to (or, for the least
+    # similar person, farthest from) the selected person, the latter plus the
+    # people farthest from the average taste. Those candidates are
+    # re-ranked by their exact distance, so the answers are real distances
+    # that may miss a closer person (recall < 1). Everything stays sparse:
+    # O(people · cells) per k-means round and O(candidates · snacks) per query.
+    def __init__(self, taste):
+        self.taste = taste
+        n = len(taste.people)
+        cells = max(1, min(MATCH_ANN_CELLS or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(0)
+        self.squares = np.asarray(taste.csr.multiply(taste.csr).sum(axis=1)).ravel()
+        self.centres = taste.csr[np.sort(rng.choice(n, cells, replace=False))].toarray()
+        for _ in range(MATCH_ANN_ROUNDS):
+            cell = self.nearest_cells(np.arange(n), 1)[:, 0]
+            members = csr_matrix((np.ones(n), (cell, np.arange(n))), shape=(cells, n))
+            sizes = np.bincount(cell, minlength=cells)
+            # An emptied cell keeps its old centre
+            self.centres = np.where(sizes[:, None] > 0, (members @ taste.csr).toarray() / np.maximum(sizes, 1)[:, None], self.centres)
+        self.cell = self.nearest_cells(np.arange(n), 1)[:, 0]
+        self.order = np.argsort(self.cell, kind="stable")
+        self.starts = np.searchsorted(self.cell[self.order], np.arange(cells + 1))
+        # The people farthest from the average taste are candidates for everyone's least similar
+        self.outliers = np.argsort(-taste.norm1, kind="stable")[:MATCH_ANN_PROBES * 4]
+
+    def cell_distances(self, people):
+        # Squared euclidean distance to every cell centre, as one sparse product
+        products = np.asarray(self.taste.csr[people] @ self.centres.T)
+        return self.squares[people, None] - 2 * products + (self.centres ** 2).sum(axis=1)
+
+    def nearest_cells(self, people, probes):
+        dist = self.cell_distances(people)
+        probes = min(probes, dist.shape[1])
+        return np.argpartition(dist, probes - 1, axis=1)[:, :probes]
+
+    def members(self, cells, person):
+        found = np.concatenate([self.order[self.starts[cell]:self.starts[cell + 1]] for cell in cells])
+        return found[found != person]
+
+    def distances(self, person, others):
+        # Exact mean cityblock distances from `person` to `others`
+        gaps = self.taste.csr[others] - self.taste.csr[np.full(len(others), person)]
+        return (np.asarray(abs(gaps).sum(axis=1)).ravel() / len(self.taste.snacks)).round(10)
+
+    def top_k(self, person, k):
+        others = np.sort(self.members(self.nearest_cells([person], MATCH_ANN_PROBES)[0], person))
+        if len(others) < k:
+            # Too few people in the probed cells to fill the list: compare against everyone
+            dist = self.taste.distances_from(person)
+            return [(other, dist[other]) for other in closest(dist, k)]
+        dist = self.distances(person, others)
+        order = np.lexsort((others, dist))[:k]
+        return [(others[i], dist[i]) for i in order]
+
+    def least_similar(self, person):
+        far = np.argsort(-self.cell_distances([person])[0], kind="stable")[:MATCH_ANN_PROBES]
+        others = np.union1d(self.members(far, person), self.outliers[self.outliers != person])
+        dist = self.distances(person, others)
+        farthest = np.argmax(dist)
+        return others[farthest], dist[farthest]
+
+@st.cache_resource(max_entries=4)
+def approximate_similarity(ratings_version, names_version, _taste):
+    return ApproximateSimilarity(_taste)
+
+def shared_favourites(mine, theirs, limit=2):
+    # (category, snack) pairs two people agree they really liked: ratings
+    # within 1 point of each other averaging at least 4. Per category the
+    # highest average wins, the first shared snack on ties; categories are
+    # tried in PREFERRED_CATS order until `limit` are found. `mine` and
+    # `theirs` are snack × category tables of one person's mean ratings.
+    shared = mine.index.intersection(theirs.index)
+    if len(shared) == 0:
+        return []
+    a = mine.loc[shared, PREFERRED_CATS].to_numpy(dtype=float)
+    b = theirs.loc[shared, PREFERRED_CATS].to_numpy(dtype=float)
+    avg = (a + b) / 2
+    liked = (np.abs(a - b) <= 1) & (avg >= 4)
+    best = np.where(liked, avg, -np.inf).argmax(axis=0)
+    found = [(cat, shared[best[i]]) for i, cat in enumerate(PREFERRED_CATS) if liked[best[i], i]]
+    return found[:limit]
+
+sources = data_sources()
+start_poller()
+loaded = load_sources(sources)
+
+ratings, error, _ = loaded["ratings"]
+if error is not None:
+    st.error(f"Could not load ratings sheet.\n\nError: {error}")
     st.stop()
 
-try:
-    snack_names = load_snack_names()
-except Exception as e:
-    st.warning(f"Could not load snack names — showing IDs.\n\nError: {e}")
-    snack_names = {}
+names, error, _ = loaded["snack names"]
+if error is not None:
+    st.warning(f"Could not load snack names — showing IDs.\n\nError: {error}")
+    names = ({}, None)
 
-def clean_id(val):
-    try:
-        return str(int(float(val))).strip()
-    except (ValueError, TypeError):
-        return str(val).strip()
+(raw_df, ratings_version), (snack_names, names_version) = ratings, names
+df, unresolved_ids = prepare_ratings(ratings_version, names_version, raw_df, snack_names)
+
+cube = rating_cube(ratings_version, names_version, df)
 
-df["Snack Label"] = df[COL_SNACK].map(lambda x: snack_label(clean_id(x), snack_names))
+rerun_on_new_data(sources, (ratings_version, names_version))
 
 if st.button("🔄 Refresh"):
-    st.cache_data.clear()
+    # Only these two sheets, and at most once per cooldown for all users together
+    wait([f for f in (source.refresh(min_interval=REFRESH_COOLDOWN) for source in sources.values()) if f],
+         timeout=2 * FETCH_TIMEOUT)
     st.rerun()
 
+st.caption("Loaded " + " · ".join(
+    f"{name} in {source.seconds * 1000:.0f} ms" + (" (refresh failed, showing last good data)" if source.error and source.value else "")
+    for name, source in sources.items()
+))
+
+if snack_names and len(unresolved_ids):
+    with st.expander(f"⚠️ {len(unresolved_ids)} snack IDs have no name in the snack names sheet"):
+        st.dataframe(unresolved_ids, hide_index=True)
+
 st.divider()
 
 # ── 1. TOP SNACKS ─────────────────────────────────────────────────────────────
 
 st.header("🏆 Top Snacks")
 
-snack_rater_counts = df.groupby("Snack Label")[COL_NAME].nunique()
-qualified_snacks = snack_rater_counts[snack_rater_counts >= 3].index
-
-snack_avgs = (
-    df[df["Snack Label"].isin(qualified_snacks)]
-    .groupby("Snack Label")[RATING_COLS]
-    .mean()
-    .round(2)
-    .reset_index()
+totals = snack_totals().sync(df, ratings_version, names_version)
+ranking = st.radio(
+    "Rank snacks by", ["At least 3 raters", "Weighted average"], horizontal=True,
+    help=f"Weighted average ranks every rated snack, counting it as if it also had "
+         f"{RANKING_PRIOR_WEIGHT} ratings at the overall average.",
 )
-snack_avgs.columns = ["Snack"] + RATING_LABELS
+if ranking == "At least 3 raters":
+    # Only snacks with at least 3 distinct raters qualify
+    snack_avgs = totals.averages(3, df["Snack Label"].cat.categories).round(2)
+else:
+    snack_avgs = totals.shrunk_averages(RANKING_PRIOR_WEIGHT, df["Snack Label"].cat.categories).round(2)
+board = leaderboard(ratings_version, names_version, ranking, snack_avgs)
 
 category_col_map = {
     "Flavour":      COL_FLAVOUR,
@@ -173,96 +1248,138 @@ category_col_map = {
 
 MEDALS = ["🥇", "🥈", "🥉"]
 
-for label in RATING_LABELS:
+for cat, (label, top) in enumerate(zip(RATING_LABELS, board.top(TOP_SNACKS))):
     st.markdown(f"<div class='section-label'>The top snacks in the category <span style='font-size:1.1rem; font-weight:700; color:#222; text-transform:none; letter-spacing:0;'>{label}</span> are:</div>", unsafe_allow_html=True)
-    top3 = snack_avgs.nlargest(3, label)[["Snack", label]].reset_index(drop=True)
-    for i, row in top3.iterrows():
+    for i, snack in enumerate(top):
+        medal = MEDALS[i] if i < len(MEDALS) else ""
         st.markdown(f"""
         <div class="snack-card">
-            <div class="rank">{MEDALS[i]} #{i+1}</div>
-            <div class="name">{row['Snack']}</div>
-            <div class="score">{row[label]:.1f} / 6</div>
+            <div class="rank">{medal} #{i+1}</div>
+            <div class="name">{board.labels[snack]}</div>
+            <div class="score">{board.scores[snack, cat]:.1f} / 6</div>
         </div>
         """, unsafe_allow_html=True)
     st.write("")
 
+# Where does my snack stand?
+lookup = st.selectbox(
+    "Find a snack", df["Snack Label"].cat.categories, index=None, placeholder="Type a snack name…",
+)
+if lookup is not None:
+    standing = board.standing(lookup)
+    if standing is None:
+        # Only the 3-rater rule leaves out snacks that have ratings
+        raters = totals.rater_count(lookup)
+        if raters and ranking == "At least 3 raters":
+            st.info(f"{lookup} has {raters} rater{'s' if raters != 1 else ''} so far; snacks need at least 3 to be ranked.")
+        else:
+            st.info(f"{lookup} has no ratings yet.")
+    else:
+        for column, label, (rank, percentile), score in zip(
+            st.columns(len(RATING_LABELS)), RATING_LABELS, standing, board.scores[board.positions[lookup]],
+        ):
+            column.metric(label, f"#{rank} of {len(board.labels)}")
+            column.caption(f"{score:.1f} / 6 · top {percentile:.0f}%")
+
+if st.toggle("Show full rankings"):
+    order = board.ranking()
+    for cat, label in enumerate(RATING_LABELS):
+        st.markdown(f"**{label}**")
+        st.dataframe(
+            pd.DataFrame({"Snack": board.labels[order[cat]], label: board.scores[order[cat], cat]},
+                         index=pd.RangeIndex(1, len(board.labels) + 1, name="Rank")),
+        )
+
 st.divider()
 
 # ── 2. SNACK MATCHES ──────────────────────────────────────────────────────────
 
 st.header("🤝 Snack Matches")
 
-if df[COL_NAME].nunique() < 2:
+if len(cube.people) < 2:
     st.info("Need at least 2 people to calculate taste similarity.")
 else:
     # Build person × snack matrix for similarity
-    person_snack = (
-        df.groupby([COL_NAME, "Snack Label"])[RATING_COLS]
-        .mean()
-        .mean(axis=1)
-        .unstack("Snack Label")
-        .fillna(df[RATING_COLS].stack().mean())
+    taste = taste_matrix(ratings_version, names_version, cube)
+    people = taste.people.tolist()
+
+    selected_person = st.selectbox("Select a person", people)
+    person = people.index(selected_person)
+    metric = st.selectbox(
+        "Compare tastes by", list(MATCH_METRICS), index=list(MATCH_METRICS).index(MATCH_METRIC),
+        format_func=lambda m: MATCH_METRICS[m][0],
     )
+    # Per category, loving the flavour and hating the texture doesn't average
+    # out to the same as feeling neutral about both
+    categories = None
+    if st.radio("Match on", ["Overall score", "Each category"], horizontal=True) == "Each category":
+        chosen = st.multiselect("Categories", RATING_LABELS, default=RATING_LABELS)
+        if not chosen:
+            st.info("Pick at least one category to match on.")
+            st.stop()
+        categories = tuple(sorted(RATING_LABELS.index(cat) for cat in chosen))
 
-    people = person_snack.index.tolist()
+    backend = MATCH_BACKEND
+    if backend in ("sparse", "incremental", "approximate") and (metric != "filled" or categories is not None):
+        backend = "dense"
+    # An all-pairs pass is only worth it for the choice every page opens on;
+    # building one per metric and category choice would make viewers wait
+    # seconds and evict each other's indexes
+    if backend in ("index", "blocked") and (metric != MATCH_METRIC or categories is not None):
+        backend = "dense"
 
-    dist_values = cdist(person_snack.values, person_snack.values, metric="cityblock") / person_snack.shape[1]
-    dist_matrix = pd.DataFrame(dist_values, index=people, columns=people)
-    dist_matrix_copy = dist_matrix.values.copy()
-    np.fill_diagonal(dist_matrix_copy, np.nan)
-    dist_matrix = pd.DataFrame(dist_matrix_copy, index=people, columns=people)
+    match_people = people
+    if backend in ("index", "blocked", "approximate"):
+        if backend != "approximate":
+            index = similarity_index(ratings_version, names_version, metric, categories, backend == "index", taste)
+        else:
+            index = approximate_similarity(ratings_version, names_version, taste)
+        close_matches = index.top_k(person, 4)
+        least_similar, least_similar_score = index.least_similar(person)
+    else:
+        found = None
+        if backend == "incremental":
+            found = incremental_similarity().distances_from(df, ratings_version, names_version, selected_person)
+        if found is not None:
+            match_people, dist = found
+        elif backend == "sparse":
+            dist = taste.distances_from(person)
+        else:
+            # Also an incremental engine that has moved on to a newer version
+            dist = row_distances(taste, person, metric, categories)
+        close_matches = [(other, dist[other]) for other in closest(dist, 4)]
+        if close_matches:
+            least_similar = np.nanargmax(dist)
+            least_similar_score = dist[least_similar]
 
-    selected_person = st.selectbox("Select a person", sorted(people))
+    if not close_matches:
+        st.info(f"Nobody has rated at least {MATCH_MIN_OVERLAP} of the same snacks as {selected_person} yet.")
+        st.stop()
 
-    most_similar_name  = dist_matrix.loc[selected_person].idxmin()
-    most_similar_score = round(dist_matrix.loc[selected_person].min(), 2)
-    least_similar_name = dist_matrix.loc[selected_person].idxmax()
-    least_similar_score = round(dist_matrix.loc[selected_person].max(), 2)
+    most_similar, most_similar_score = close_matches[0]
+    most_similar_name   = match_people[most_similar]
+    most_similar_score  = round(most_similar_score, 2)
+    least_similar_name  = match_people[least_similar]
+    least_similar_score = round(least_similar_score, 2)
 
     # ── Find shared agreements ────────────────────────────────────────────────
-    # Per-person, per-snack, per-category averages
-    person_detail = (
-        df.groupby([COL_NAME, "Snack Label"])[RATING_COLS]
-        .mean()
-        .round(2)
-    )
-    person_detail.columns = RATING_LABELS
+    person_detail = cube.person_detail
 
     # Find snacks rated by both people
     try:
         p1_data = person_detail.loc[selected_person]
         p2_data = person_detail.loc[most_similar_name]
-        shared_snacks = p1_data.index.intersection(p2_data.index)
 
         agreement_sentences = []
 
-        if len(shared_snacks) > 0:
-            # Try preferred categories first (Flavour, Texture), then fall back
-            found_cats = []
-            for cat in PREFERRED_CATS:
-                if len(found_cats) == 2:
-                    break
-                best_snack = None
-                best_avg = -1
-                for snack in shared_snacks:
-                    r1 = p1_data.loc[snack, cat]
-                    r2 = p2_data.loc[snack, cat]
-                    # Must be within 1 star of each other AND average >= 4
-                    if abs(r1 - r2) <= 1:
-                        avg = (r1 + r2) / 2
-                        if avg >= 4 and avg > best_avg:
-                            best_avg = avg
-                            best_snack = snack
-                if best_snack:
-                    found_cats.append((cat, best_snack, round(best_avg, 1)))
-
-            for cat, snack, avg in found_cats:
-                r1 = round(p1_data.loc[snack, cat])
-                r2 = round(p2_data.loc[snack, cat])
-                agreement_sentences.append(
-                    f"You both really liked the <b>{cat.lower()}</b> of <b>{snack}</b> "
-                    f"({selected_person}: {r1}, {most_similar_name}: {r2})"
-                )
+        # Try preferred categories first (Flavour, Texture), then fall back
+        for cat, snack in shared_favourites(p1_data, p2_data):
+            r1 = round(p1_data.loc[snack, cat])
+            r2 = round(p2_data.loc[snack, cat])
+            agreement_sentences.append(
+                f"You both really liked the <b>{cat.lower()}</b> of <b>{snack}</b> "
+                f"({selected_person}: {r1}, {most_similar_name}: {r2})"
+            )
     except KeyError:
         agreement_sentences = []
 
@@ -280,3 +1397,6 @@ else:
         {agreement_html}
     </div>
     """, unsafe_allow_html=True)
+
+    if len(close_matches) > 1:
+        st.caption("Also close: " + ", ".join(f"{match_people[other]} ({score:.2f})" for other, score in close_matches[1:]))
@@ -0,0 +1,74 @@
+"""Load snack_dashboard's definitions without running the page.
+
+The dashboard is a Streamlit script: importing it would render the page and
+fetch both sheets. Tests and benchmarks only need its configuration,
+functions and classes, so those are picked out of the module and executed
+on their own.
+"""
+import ast
+import logging
+import types
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent.parent / "snack_dashboard.py"
+
+
+def _is_definition(node):
+    if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)):
+        return True
+    # CONFIG constants are the only upper-case assignments
+    return isinstance(node, ast.Assign) and all(
+        isinstance(target, ast.Name) and target.id.isupper() for target in node.targets
+    )
+
+
+def load_dashboard():
+    # Streamlit warns about every cache decorator outside `streamlit run`
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    tree = ast.parse(APP.read_text(), filename=str(APP))
+    tree.body = [node for node in tree.body if _is_definition(node)]
+    module = types.ModuleType("snack_dashboard")
+    module.__file__ = str(APP)
+    exec(compile(tree, str(APP), "exec"), module.__dict__)
+    return module
+
+
+def synthetic_ratings(sd, people, snacks, rows, seed=0):
+    # Prepared ratings (as prepare_ratings returns them) with whole-number
+    # ratings 1-6, spread uniformly over people and snacks
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    labels = [f"Snack {i}" for i in range(snacks)]
+    df = pd.DataFrame({
+        sd.COL_NAME: [f"Person {i}" for i in rng.integers(0, people, rows)],
+        sd.COL_SNACK: rng.integers(0, snacks, rows).astype(str),
+    })
+    for col in sd.RATING_COLS:
+        df[col] = rng.integers(1, 7, rows).astype(float)
+    df["Snack Label"] = pd.Categorical.from_codes(df[sd.COL_SNACK].astype(int), labels)
+    return df
+
+
+def loop_shared_favourites(sd, mine, theirs, limit=2):
+    # The agreement finder as it was before shared_favourites: a scalar
+    # lookup per shared snack and category. Kept as the reference.
+    shared_snacks = mine.index.intersection(theirs.index)
+    found_cats = []
+    for cat in sd.PREFERRED_CATS:
+        if len(found_cats) == limit:
+            break
+        best_snack = None
+        best_avg = -1
+        for snack in shared_snacks:
+            r1 = mine.loc[snack, cat]
+            r2 = theirs.loc[snack, cat]
+            if abs(r1 - r2) <= 1:
+                avg = (r1 + r2) / 2
+                if avg >= 4 and avg > best_avg:
+                    best_avg = avg
+                    best_snack = snack
+        if best_snack:
+            found_cats.append((cat, best_snack))
+    return found_cats
@@ -0,0 +1,37 @@
+"""shared_favourites against the loop it replaced."""
+import numpy as np
+import pandas as pd
+
+from support import load_dashboard, loop_shared_favourites
+
+sd = load_dashboard()
+
+
+def person_detail(rng, snacks, rated):
+    # One person's rounded per-snack category means, as person_detail holds them
+    index = pd.Index(rng.choice([f"Snack {i}" for i in range(snacks)], rated, replace=False), name="Snack Label")
+    means = rng.integers(2, 13, (rated, 4)) / rng.choice([1, 2, 3], (rated, 4))
+    return pd.DataFrame(means, index=index, columns=sd.RATING_LABELS).round(2)
+
+
+def test_matches_the_loop_on_random_pairs():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        rated = int(rng.integers(1, 40))
+        mine, theirs = person_detail(rng, 60, rated), person_detail(rng, 60, rated)
+        assert sd.shared_favourites(mine, theirs) == loop_shared_favourites(sd, mine, theirs)
+
+
+def test_first_shared_snack_wins_ties():
+    index = pd.Index(["B", "A", "C"], name="Snack Label")
+    mine = pd.DataFrame(5.0, index=index, columns=sd.RATING_LABELS)
+    theirs = mine.loc[["C", "A", "B"]]
+    assert sd.shared_favourites(mine, theirs) == [("Flavour", "B"), ("Texture", "B")]
+    assert loop_shared_favourites(sd, mine, theirs) == [("Flavour", "B"), ("Texture", "B")]
+
+
+def test_nothing_shared():
+    rng = np.random.default_rng(1)
+    mine = person_detail(rng, 10, 3)
+    theirs = mine.rename(index=lambda label: label + " (other)")
+    assert sd.shared_favourites(mine, theirs) == []
@@ -0,0 +1,169 @@
+"""SheetFetcher against a local stand-in for the Google Sheets CSV export."""
+import gzip
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from support import load_dashboard
+
+sd = load_dashboard()
+
+CSV = b"Snack ID:,What is your snack called?\n1,Crisps\n2,Pretzels\n" * 50
+
+
+class Sheet:
+    # What the stand-in serves, and what it has sent so far
+    def __init__(self):
+        self.body = CSV
+        self.validators = True
+        self.gzip = False
+        self.requests = []
+        self.bytes_sent = 0
+
+    @property
+    def etag(self):
+        return '"' + hashlib.sha256(self.body).hexdigest()[:16] + '"'
+
+
+@pytest.fixture
+def sheet():
+    sheet = Sheet()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sheet.requests.append(dict(self.headers))
+            if sheet.validators and self.headers.get("If-None-Match") == sheet.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = sheet.body
+            self.send_response(200)
+            if sheet.gzip and "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                self.send_header("Content-Encoding", "gzip")
+            if sheet.validators:
+                self.send_header("ETag", sheet.etag)
+                self.send_header("Last-Modified", "Sat, 17 Oct 2026 10:00:00 GMT")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            sheet.bytes_sent += len(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    sheet.url = f"http://127.0.0.1:{server.server_port}/export?format=csv"
+    yield sheet
+    server.shutdown()
+    server.server_close()
+
+
+class CountingParse:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, body):
+        self.calls += 1
+        return body.decode()
+
+
+def test_not_modified_reuses_parsed_value(sheet):
+    fetcher, parse = sd.SheetFetcher(sheet.url), CountingParse()
+    first, version = fetcher.get(parse)
+    sent = sheet.bytes_sent
+
+    again, again_version = fetcher.get(parse)
+
+    assert sheet.requests[-1]["If-None-Match"] == sheet.etag
+    assert "If-Modified-Since" in sheet.requests[-1]
+    assert sheet.bytes_sent == sent
+    assert parse.calls == 1
+    assert again is first and again_version == version
+
+
+def test_identical_body_without_validators_is_not_parsed_again(sheet):
+    sheet.validators = False
+    fetcher, parse = sd.SheetFetcher(sheet.url), CountingParse()
+    _, version = fetcher.get(parse)
+
+    _, again_version = fetcher.get(parse)
+
+    assert "If-None-Match" not in sheet.requests[-1]
+    assert sheet.bytes_sent == 2 * len(CSV)
+    assert parse.calls == 1
+    assert again_version == version
+
+
+def test_gzip_transfer(sheet):
+    sheet.gzip = True
+    fetcher, parse = sd.SheetFetcher(sheet.url), CountingParse()
+
+    value, _ = fetcher.get(parse)
+
+    assert sheet.requests[0]["Accept-Encoding"] == "gzip"
+    assert value == CSV.decode()
+    assert sheet.bytes_sent < len(CSV) // 4
+
+
+def test_unchanged_sheet_is_never_parsed_again(sheet):
+    fetcher, parse = sd.SheetFetcher(sheet.url), CountingParse()
+    for _ in range(5):
+        fetcher.get(parse)
+    assert parse.calls == 1
+    assert len(sheet.requests) == 5
+    assert sheet.bytes_sent == len(CSV)
+
+
+def test_changed_sheet_is_parsed_with_a_new_version(sheet):
+    fetcher, parse = sd.SheetFetcher(sheet.url), CountingParse()
+    _, version = fetcher.get(parse)
+
+    sheet.body = CSV + b"3,Popcorn\n"
+    value, new_version = fetcher.get(parse)
+
+    assert parse.calls == 2
+    assert new_version != version
+    assert value.endswith("3,Popcorn\n")
+
+
+@pytest.fixture
+def hung_url():
+    # Accepts the request and never answers
+    release = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            release.wait(10)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/export?format=csv"
+    release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def test_hung_request_times_out(hung_url, monkeypatch):
+    monkeypatch.setattr(sd, "FETCH_TIMEOUT", 0.5)
+    with pytest.raises(OSError):
+        sd.SheetFetcher(hung_url).get(CountingParse())
+
+
+def test_hung_request_does_not_wedge_the_source(hung_url, monkeypatch):
+    monkeypatch.setattr(sd, "FETCH_TIMEOUT", 0.5)
+    source = sd.SheetSource(hung_url, CountingParse(), lambda: None)
+    first = source.refresh()
+
+    with pytest.raises(OSError):
+        first.result(timeout=5)
+
+    assert source.error is not None
+    assert source.refresh() is not first
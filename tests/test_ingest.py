@@ -0,0 +1,107 @@
+"""RatingsIngest's append-only tail parsing against a full reload."""
+import io
+
+import pandas as pd
+import pytest
+
+from support import load_dashboard
+
+sd = load_dashboard()
+
+HEADER = ",".join(["Timestamp", f'"{sd.COL_NAME}"', f'"{sd.COL_SNACK}"'] + [f'"{c}"' for c in sd.RATING_COLS])
+
+
+def sheet(*rows, newline="\n", final=True):
+    body = newline.join([HEADER, *rows])
+    return (body + (newline if final else "")).encode()
+
+
+def full_reload(body):
+    return sd.clean_ratings(pd.read_csv(io.BytesIO(body)))
+
+
+def assert_reloads(ingest, body):
+    pd.testing.assert_frame_equal(ingest.ingest(body), full_reload(body))
+
+
+ROWS = [
+    "1/1,Ann,12,5,4,3,2",
+    "1/1,Bob,12.0,3,3,3,3",
+    '1/1,"Smith, Cat",007,6,5,4,3',
+]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_appended_rows(newline):
+    ingest = sd.RatingsIngest()
+    assert_reloads(ingest, sheet(*ROWS[:2], newline=newline))
+    assert_reloads(ingest, sheet(*ROWS, newline=newline))
+    assert_reloads(ingest, sheet(*ROWS, "1/2,Dan,3,1,2,3,4", '1/2,"Eve, Jr",12,2,2,2,2', newline=newline))
+
+
+def test_unchanged_body():
+    ingest = sd.RatingsIngest()
+    first = ingest.ingest(sheet(*ROWS))
+    assert ingest.ingest(sheet(*ROWS)) is first
+
+
+def test_edited_earlier_row():
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(*ROWS))
+    assert_reloads(ingest, sheet(ROWS[0], "1/1,Bob,12,1,1,1,1", ROWS[2], "1/2,Dan,3,1,2,3,4"))
+
+
+def test_shorter_body():
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(*ROWS))
+    assert_reloads(ingest, sheet(*ROWS[:2]))
+
+
+def test_last_row_without_newline_extended():
+    # "…,2" growing into "…,2" + "5" must not be read as a new row "5"
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(ROWS[0], "1/1,Bob,12,3,3,3,2", final=False))
+    assert_reloads(ingest, sheet(ROWS[0], "1/1,Bob,12,3,3,3,25"))
+
+
+def test_last_row_without_newline_then_appended():
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(*ROWS, final=False))
+    assert_reloads(ingest, sheet(*ROWS, "1/2,Dan,3,1,2,3,4"))
+
+
+def test_tail_with_a_different_column_count():
+    # A short row parses on its own with fewer columns but is padded in a full load
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(*ROWS))
+    assert_reloads(ingest, sheet(*ROWS, "1/2,Dan,3,1,2,3"))
+    assert_reloads(ingest, sheet(*ROWS, "1/2,Dan,3,1,2,3", "1/2,Eve,4,1,2,3,4"))
+
+
+def test_tail_with_extra_columns_fails_like_a_full_load():
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(*ROWS))
+    body = sheet(*ROWS, "1/2,Dan,3,1,2,3,4,extra")
+    with pytest.raises(pd.errors.ParserError):
+        full_reload(body)
+    with pytest.raises(pd.errors.ParserError):
+        ingest.ingest(body)
+    # The failed body is not remembered, so the next good one still appends
+    assert_reloads(ingest, sheet(*ROWS, "1/2,Dan,3,1,2,3,4"))
+
+
+def test_unparsable_tail_fails_like_a_full_load():
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(*ROWS))
+    body = sheet(*ROWS, '1/2,"Dan,3,1,2,3,4')
+    with pytest.raises(pd.errors.ParserError):
+        full_reload(body)
+    with pytest.raises(pd.errors.ParserError):
+        ingest.ingest(body)
+    assert_reloads(ingest, sheet(*ROWS, '1/2,"Dan",3,1,2,3,4'))
+
+
+def test_invalid_rows_are_dropped_like_a_full_load():
+    ingest = sd.RatingsIngest()
+    ingest.ingest(sheet(*ROWS))
+    assert_reloads(ingest, sheet(*ROWS, "1/2,,3,1,2,3,4", "1/2,Dan,3,n/a,2,3,4", "1/2,Eve,4,1,2,3,4"))
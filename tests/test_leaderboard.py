@@ -0,0 +1,55 @@
+"""Top Snacks leaderboard against pandas on tie-heavy score tables."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from support import load_dashboard
+
+sd = load_dashboard()
+
+
+def tied_tables(count=200, seed=0):
+    # Snacks × categories averages drawn from a few values, so ties are common
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        snacks = int(rng.integers(1, 40))
+        scores = rng.integers(4, 24, (snacks, len(sd.RATING_LABELS))) / 4
+        yield pd.DataFrame(scores, index=[f"Snack {i}" for i in rng.permutation(snacks)], columns=sd.RATING_LABELS)
+
+
+@pytest.mark.parametrize("k", [1, 3, 5])
+def test_top_matches_nlargest(k):
+    for table in tied_tables():
+        board = sd.Leaderboard(table.index, table.to_numpy())
+        top = board.top(k)
+        for cat, label in enumerate(sd.RATING_LABELS):
+            assert list(board.labels[top[cat]]) == list(table[label].nlargest(k).index)
+
+
+def test_top_after_the_full_ranking_is_the_same():
+    for table in tied_tables(50, seed=1):
+        fresh = sd.Leaderboard(table.index, table.to_numpy())
+        ranked = sd.Leaderboard(table.index, table.to_numpy())
+        ranked.ranking()
+        for k in (1, 3, 5):
+            assert np.array_equal(fresh.top(k), ranked.top(k))
+
+
+def test_ranking_matches_a_stable_sort():
+    for table in tied_tables(seed=2):
+        board = sd.Leaderboard(table.index, table.to_numpy())
+        for cat, label in enumerate(sd.RATING_LABELS):
+            expected = table[label].sort_values(ascending=False, kind="stable").index
+            assert list(board.labels[board.ranking()[cat]]) == list(expected)
+
+
+def test_ranks_and_standing_match_min_rank():
+    for table in tied_tables(seed=3):
+        board = sd.Leaderboard(table.index, table.to_numpy())
+        expected = table.rank(ascending=False, method="min").astype(int)
+        assert np.array_equal(board.ranks(), expected.to_numpy())
+        for label in table.index:
+            standing = board.standing(label)
+            assert [rank for rank, _ in standing] == list(expected.loc[label])
+            assert [pct for _, pct in standing] == pytest.approx(list(100 * expected.loc[label] / len(table)))
+        assert board.standing("Not a snack") is None
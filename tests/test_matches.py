@@ -0,0 +1,98 @@
+"""Snack Matches neighbour selection."""
+import numpy as np
+
+from support import load_dashboard, synthetic_ratings
+
+sd = load_dashboard()
+
+
+def reference_closest(dist, k):
+    # Sort everyone by (distance, index), NaN last
+    order = sorted((d, i) for i, d in enumerate(dist) if not np.isnan(d))
+    return [i for _, i in order[:k]]
+
+
+def test_tie_at_the_cut_off_keeps_the_lowest_index():
+    dist = np.ones(30)
+    dist[[9, 11, 13, 14, 16, 20, 25, 28]] = 0
+    dist[3] = np.nan
+
+    assert list(sd.closest(dist, 4)) == [9, 11, 13, 14]
+    assert sd.closest(dist, 1)[0] == np.nanargmin(dist)
+
+
+def test_closest_matches_a_full_sort_on_tie_heavy_rows():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        n = rng.integers(2, 200)
+        dist = rng.integers(0, 4, n).astype(float)
+        dist[rng.random(n) < 0.1] = np.nan
+        for k in (1, 4, 5):
+            assert list(sd.closest(dist, k)) == reference_closest(dist, k)
+
+
+def small_cube():
+    return sd.RatingCube(synthetic_ratings(sd, people=40, snacks=15, rows=400, seed=1))
+
+
+def test_per_category_cosine_matches_a_direct_computation():
+    cube = small_cube()
+    taste = sd.TasteMatrix(cube)
+    means = cube.means
+    expected = []
+    for cat in (0, 2):
+        grid = means[sd.RATING_COLS[cat]].unstack().fillna(0).to_numpy()
+        unit = grid / np.linalg.norm(grid, axis=1, keepdims=True)
+        expected.append(1 - unit[5] @ unit.T)
+    got = sd.metric_distances(taste, np.array([5]), "cosine", (0, 2))[0]
+    assert np.allclose(got, np.mean(expected, axis=0))
+
+
+def test_other_metrics_and_categories_build_no_dense_grid():
+    from itertools import combinations
+    taste = sd.TasteMatrix(small_cube())
+    subsets = [c for size in range(1, 5) for c in combinations(range(4), size)]
+    for metric in sd.MATCH_METRICS:
+        for categories in [None] + subsets:
+            if (metric, categories) != ("filled", None):
+                sd.row_distances(taste, 0, metric, categories)
+    assert taste._grid is None
+
+
+def test_worker_threads_build_the_same_index(monkeypatch):
+    taste = sd.TasteMatrix(small_cube())
+    # Small blocks, so the pool really gets several
+    monkeypatch.setattr(sd, "MATCH_MEMORY_BUDGET", 8 * 4 * len(taste.people) * (len(taste.snacks) + 1))
+    for metric in sd.MATCH_METRICS:
+        monkeypatch.setattr(sd, "MATCH_WORKERS", 1)
+        single = sd.SimilarityIndex(taste, metric)
+        monkeypatch.setattr(sd, "MATCH_WORKERS", 3)
+        threaded = sd.SimilarityIndex(taste, metric)
+        assert np.array_equal(single.nearest, threaded.nearest)
+        assert np.array_equal(single.farthest, threaded.farthest)
+        assert np.array_equal(single.condensed, threaded.condensed, equal_nan=True)
+
+
+def test_incremental_engine_answers_per_version():
+    df = synthetic_ratings(sd, people=30, snacks=12, rows=300, seed=2)
+    v1 = df.copy()
+    v1.loc[v1.index[0], sd.COL_NAME] = "Typo Name"
+    v2 = df
+    engine = sd.IncrementalSimilarity()
+
+    people, dist = engine.distances_from(v1, "v1", "names", "Typo Name")
+    assert "Typo Name" in people
+    assert engine.distances_from(v2, "v2", "names", "Person 0") is not None
+    # A session still on v1 is not answered from v2 (no KeyError) and
+    # doesn't make the engine rebuild back to v1
+    triangle = engine.totals
+    assert engine.distances_from(v1, "v1", "names", "Typo Name") is None
+    assert engine.distances_from(v2, "v2", "names", "Typo Name") is None
+    assert engine.synced == ("v2", "names") and engine.totals is triangle
+
+    # What it returns for v2 is v2's own filled distances
+    taste = sd.TasteMatrix(sd.RatingCube(v2))
+    people, dist = engine.distances_from(v2, "v2", "names", "Person 3")
+    assert people == taste.people.tolist()
+    expected = sd.row_distances(taste, people.index("Person 3"), "filled")
+    assert np.nanmax(np.abs(dist - expected)) <= sd.MATCH_FILL_TOLERANCE + 1e-6
@@ -0,0 +1,95 @@
+"""Snack Matches similarity metrics against direct pandas / numpy computations."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from support import load_dashboard, synthetic_ratings
+
+sd = load_dashboard()
+
+CATEGORY_CHOICES = [None, (0, 2), sd.ALL_CATEGORIES]
+
+
+def ratings():
+    # Random raters, plus two who give every snack the same score (no
+    # spread) and one who rated just two snacks
+    df = synthetic_ratings(sd, people=25, snacks=10, rows=250, seed=3)
+    extra = pd.DataFrame([
+        {sd.COL_NAME: name, sd.COL_SNACK: str(snack), **{col: score for col in sd.RATING_COLS}}
+        for name, snacks, score in (("Flat Fiona", range(8), 3.0), ("Flat Gus", range(2, 10), 5.0), ("Two Tom", range(2), 4.0))
+        for snack in snacks
+    ])
+    extra.loc[extra[sd.COL_NAME] == "Two Tom", sd.RATING_COLS[0]] = [1.0, 6.0]
+    extra["Snack Label"] = pd.Categorical.from_codes(extra[sd.COL_SNACK].astype(int), df["Snack Label"].cat.categories)
+    return pd.concat([df, extra], ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def cube():
+    return sd.RatingCube(ratings())
+
+
+def grids(cube, categories):
+    # people × snacks mean ratings, NaN where not rated, one per compared layer
+    if categories is None:
+        return [cube.means.mean(axis=1).unstack()]
+    return [cube.means[sd.RATING_COLS[cat]].unstack() for cat in categories]
+
+
+def average(layers):
+    # Mean over the layers that could be compared, as metric_distances does
+    layers = np.array(layers)
+    counts = (~np.isnan(layers)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, np.nansum(layers, axis=0) / counts, np.nan)
+
+
+def computed(cube, metric, categories):
+    taste = sd.TasteMatrix(cube)
+    return sd.metric_distances(taste, np.arange(len(taste.people)), metric, categories)
+
+
+@pytest.mark.parametrize("categories", CATEGORY_CHOICES)
+def test_pearson_matches_pandas_corr(cube, categories):
+    expected = average([1 - grid.T.corr(min_periods=3).to_numpy() for grid in grids(cube, categories)])
+    got = computed(cube, "pearson", categories)
+    assert np.allclose(got, expected, equal_nan=True)
+    assert not np.isinf(got).any()
+    assert np.nanmin(got) >= 0 and np.nanmax(got) <= 2
+
+
+def test_pearson_without_spread_is_nan(cube):
+    got = computed(cube, "pearson", None)
+    flat = [list(cube.means.mean(axis=1).unstack().index).index(name) for name in ("Flat Fiona", "Flat Gus")]
+    assert np.isnan(got[flat]).all() and np.isnan(got[:, flat]).all()
+
+
+@pytest.mark.parametrize("categories", CATEGORY_CHOICES)
+def test_centred_cosine_matches_a_direct_computation(cube, categories):
+    layers = []
+    for grid in grids(cube, categories):
+        centred = (grid.sub(grid.mean(axis=1), axis=0)).fillna(0).to_numpy()
+        norms = np.linalg.norm(centred, axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            layers.append(1 - (centred @ centred.T) / np.outer(norms, norms))
+    assert np.allclose(computed(cube, "centred cosine", categories), average(layers), equal_nan=True)
+
+
+@pytest.mark.parametrize("categories", CATEGORY_CHOICES)
+def test_co_rated_matches_a_direct_computation(cube, categories):
+    layers = []
+    for grid in grids(cube, categories):
+        values = grid.to_numpy()
+        n = len(values)
+        dist = np.full((n, n), np.nan)
+        for a in range(n):
+            for b in range(n):
+                shared = ~np.isnan(values[a]) & ~np.isnan(values[b])
+                overlap = shared.sum()
+                if overlap < sd.MATCH_MIN_OVERLAP:
+                    continue
+                similarity = 1 - np.abs(values[a, shared] - values[b, shared]).mean() / sd.MAX_RATING_GAP
+                similarity *= min(overlap, sd.MATCH_SIGNIFICANCE) / sd.MATCH_SIGNIFICANCE
+                dist[a, b] = (1 - similarity) * sd.MAX_RATING_GAP
+        layers.append(dist)
+    assert np.allclose(computed(cube, "co-rated", categories), average(layers), equal_nan=True)
@@ -0,0 +1,77 @@
+"""Top Snacks running totals against a groupby over all rows."""
+import numpy as np
+
+from support import load_dashboard, synthetic_ratings
+
+sd = load_dashboard()
+
+
+def expected(df, min_raters=3):
+    raters = df.groupby("Snack Label", observed=True)[sd.COL_NAME].nunique()
+    means = df.groupby("Snack Label", observed=True)[sd.RATING_COLS].mean()
+    return means[raters >= min_raters], raters
+
+
+def assert_matches(totals, df):
+    means, raters = expected(df)
+    got = totals.averages(3, df["Snack Label"].cat.categories)
+    assert list(got.index) == list(means.index)
+    assert np.allclose(got.to_numpy(), means.to_numpy())
+    for label, count in raters.items():
+        assert totals.rater_count(label) == count
+
+
+def test_appended_batches_match_a_full_groupby():
+    df = synthetic_ratings(sd, people=50, snacks=30, rows=2000)
+    running = sd.RunningSnackTotals()
+    for version, end in enumerate((0, 700, 701, 1500, 2000)):
+        totals = running.sync(df.iloc[:end], version, "names")
+    assert_matches(totals, df)
+
+
+def test_sessions_on_different_versions_get_their_own_totals():
+    df = synthetic_ratings(sd, people=50, snacks=30, rows=2000)
+    old, new = df.iloc[:1000], df
+    running = sd.RunningSnackTotals()
+
+    first_new = running.sync(new, "v2", "names")
+    first_old = running.sync(old, "v1", "names")
+    again_new = running.sync(new, "v2", "names")
+
+    assert again_new is first_new
+    assert_matches(first_old, old)
+    assert_matches(again_new, new)
+
+
+def test_edited_row_starts_over():
+    df = synthetic_ratings(sd, people=50, snacks=30, rows=2000)
+    running = sd.RunningSnackTotals()
+    running.sync(df.iloc[:1000], "v1", "names")
+
+    edited = df.copy()
+    edited.iloc[10, edited.columns.get_loc(sd.RATING_COLS[0])] = 6.0
+    edited.iloc[10, edited.columns.get_loc(sd.COL_NAME)] = "Someone new"
+
+    assert_matches(running.sync(edited, "v2", "names"), edited)
+
+
+def test_version_rebuilt_after_an_edit_does_not_see_dropped_rows():
+    df = synthetic_ratings(sd, people=50, snacks=30, rows=2051)
+    name = df.columns.get_loc(sd.COL_NAME)
+    snack = df.iloc[1500]["Snack Label"]
+    df.iloc[1500, name] = "Sam"  # Sam's only rating of that snack...
+    running = sd.RunningSnackTotals()
+    running.sync(df.iloc[:1000], "v1", "names")
+    running.sync(df.iloc[:2000], "v2", "names")
+
+    # ...until it's renamed: v3 is built from v1, not from v2
+    edited = df.copy()
+    edited.iloc[1500, name] = "Someone new"
+    assert_matches(running.sync(edited.iloc[:2000], "v3", "names"), edited.iloc[:2000])
+
+    # so a later rating of it by Sam makes them a new rater of the snack
+    edited.iloc[2050, name] = "Sam"
+    edited.iloc[2050, df.columns.get_loc("Snack Label")] = snack
+    totals = running.sync(edited, "v4", "names")
+    assert_matches(totals, edited)
+    assert totals.rater_count(snack) == edited[edited["Snack Label"] == snack][sd.COL_NAME].nunique()